@@ -3,16 +3,21 @@ Script para comparar la estructura de datos entre dos proyectos de Firebase.
 Usa file dialog para seleccionar las credenciales. 
 """
 
+import argparse
 import json
+import os
 import firebase_admin
 from firebase_admin import credentials, firestore
-from tkinter import Tk, filedialog
 from typing import Dict, Any, List
 from collections import defaultdict
 
 
 def select_credentials_file():
     """Abre un file dialog para seleccionar el archivo de credenciales."""
+    # tkinter se importa aquí: con --credentials o FIREBASE_CREDENTIALS
+    # el script no carga la GUI
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Ocultar ventana principal
     root.attributes('-topmost', True)  # Traer al frente
@@ -205,13 +210,23 @@ def print_comparison(info1: Dict, info2: Dict):
 
 def main():
     """Función principal."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--credentials',
+        type=str,
+        help='Path al archivo de credenciales Firebase (default: $FIREBASE_CREDENTIALS o file dialog)'
+    )
+    args = parser.parse_args()
+    
     print("="*80)
     print("COMPARADOR DE PROYECTOS FIREBASE - PROGRAIN 5.0")
     print("="*80)
     
-    # Seleccionar credenciales
-    print("\n📂 Selecciona el archivo de credenciales de Firebase...")
-    cred_path = select_credentials_file()
+    # Credenciales: --credentials, FIREBASE_CREDENTIALS o file dialog
+    cred_path = args.credentials or os.environ.get("FIREBASE_CREDENTIALS")
+    if not cred_path:
+        print("\n📂 Selecciona el archivo de credenciales de Firebase...")
+        cred_path = select_credentials_file()
     
     if not cred_path: 
         print("❌ No se seleccionó ningún archivo.  Saliendo...")
@@ -6,12 +6,13 @@ Convierte:
 - "transferencia_entrada" → "Ingreso" (con es_transferencia=True)
 
 Uso:
-    python migrate_transfers. py
+    python migrate_transfers. py [--credentials PATH]
 """
 
+import argparse
+import os
 import firebase_admin
 from firebase_admin import credentials, firestore
-from tkinter import Tk, filedialog, messagebox
 from typing import Dict, Any, List
 from datetime import datetime
 import logging
@@ -22,6 +23,10 @@ logger = logging.getLogger(__name__)
 
 def select_credentials_file():
     """Abre un file dialog para seleccionar el archivo de credenciales."""
+    # tkinter se importa aquí: con --credentials o FIREBASE_CREDENTIALS
+    # el script no carga la GUI
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()
     root.attributes('-topmost', True)
@@ -205,6 +210,14 @@ def migrate_project_transfers(db, proyecto_id:  str, dry_run: bool = True) -> Di
 
 def main():
     """Función principal."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--credentials',
+        type=str,
+        help='Path al archivo de credenciales Firebase (default: $FIREBASE_CREDENTIALS o file dialog)'
+    )
+    args = parser.parse_args()
+    
     print("="*80)
     print("MIGRACIÓN DE TRANSFERENCIAS - PROGRAIN 5.0")
     print("="*80)
@@ -213,9 +226,11 @@ def main():
     print("  • 'transferencia_entrada' → 'Ingreso' (con es_transferencia=True)")
     print("\n" + "="*80 + "\n")
     
-    # Seleccionar credenciales
-    print("📂 Selecciona el archivo de credenciales de Firebase...")
-    cred_path = select_credentials_file()
+    # Credenciales: --credentials, FIREBASE_CREDENTIALS o file dialog
+    cred_path = args.credentials or os.environ.get("FIREBASE_CREDENTIALS")
+    if not cred_path:
+        print("📂 Selecciona el archivo de credenciales de Firebase...")
+        cred_path = select_credentials_file()
     
     if not cred_path: 
         print("❌ No se seleccionó ningún archivo.  Saliendo...")
@@ -234,6 +249,8 @@ def main():
     print(f"✅ Encontrados {len(proyectos)} proyectos")
     
     # Confirmar ejecución
+    from tkinter import Tk, messagebox
+
     root = Tk()
     root.withdraw()
     root.attributes('-topmost', True)
@@ -10,23 +10,85 @@ Criterio de duplicado:
 Mantiene la primera transacción encontrada y elimina el resto.
 """
 
+import os
 import sys
+import sqlite3
+import multiprocessing
 from pathlib import Path
 from typing import Dict, List, Tuple
-import hashlib
-from collections import defaultdict
+from hashlib import blake2b
 
 from PyQt6.QtWidgets import (
     QApplication, QDialog, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QFileDialog, QMessageBox,
     QTextEdit, QProgressBar, QComboBox, QGroupBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QStandardPaths, pyqtSignal
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
 
+def _default_hash_cache_path() -> Path:
+    """Ruta de la caché en la carpeta de datos del usuario.
+    
+    No se usa la carpeta del paquete: en builds congeladas o instaladas
+    suele ser temporal o de solo lectura.
+    """
+    base = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.GenericDataLocation
+    )
+    if not base:
+        base = os.path.expanduser('~')
+    return Path(base) / 'PROGRAIN' / 'dedup_cache.db'
+
+
+# Caché local de hashes: (proyecto, documento, update_time) -> clave de duplicado
+HASH_CACHE_PATH = _default_hash_cache_path()
+# Incrementar cuando cambie el formato de la clave para invalidar la caché
+HASH_CACHE_VERSION = 2
+
+# Con menos claves por calcular que esto, un pool de procesos cuesta más
+# (arranque + pickling) de lo que ahorra
+PARALLEL_MIN_ROWS = 50_000
+
+# Apps de Firebase ya inicializadas en este proceso: huella -> (app, cliente)
+_FIREBASE_APPS: Dict[Tuple, Tuple] = {}
+
+
+def _credentials_fingerprint(filepath: str) -> Tuple:
+    """Huella del archivo de credenciales: (ruta, mtime, tamaño)"""
+    st = os.stat(filepath)
+    return (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def _dedup_key(doc_id: str, fecha, desc, monto) -> bytes:
+    """Genera hash único (8 bytes blake2b) basado en fecha, descripción y monto"""
+    try:
+        if not isinstance(fecha, str):
+            fecha = '' if fecha is None else str(fecha)
+        if not isinstance(desc, str):
+            desc = '' if desc is None else str(desc)
+        # Monto en centavos enteros: evita formatear floats por fila
+        cents = int(round(float(monto or 0) * 100))
+        
+        raw = f"{fecha}|{desc.strip().lower()}|{cents}"
+        return blake2b(raw.encode('utf-8'), digest_size=8).digest()
+    except Exception:
+        return f"error_{doc_id}".encode('utf-8')
+
+
+def _compute_keys(rows: List[Tuple]) -> List[bytes]:
+    """Calcula las claves de un bloque de filas (doc_id, (fecha, monto, descripcion)).
+    
+    Función de módulo para poder usarse desde un multiprocessing.Pool.
+    """
+    return [
+        _dedup_key(did, fecha, desc, monto)
+        for did, (fecha, monto, desc) in rows
+    ]
+
+
 class CleanupWorker(QThread):
     """Worker thread para limpiar duplicados sin bloquear UI"""
     
@@ -35,31 +97,84 @@ class CleanupWorker(QThread):
     finished = pyqtSignal(int, int)  # (total_duplicates, total_deleted)
     error = pyqtSignal(str)
     
+    LOG_FLUSH_EVERY = 200       # líneas de log acumuladas antes de emitir
+    PROGRESS_EVERY = 100        # filas entre actualizaciones de progreso
+    
     def __init__(self, db, proyecto_id:  str, dry_run: bool = True):
         super().__init__()
         self.db = db
         self.proyecto_id = proyecto_id
         self.dry_run = dry_run
         self._is_running = True
+        self._log_buf: List[str] = []
     
     def stop(self):
         self._is_running = False
     
-    def _generate_hash(self, trans:  Dict) -> str:
-        """Genera hash único basado en fecha, descripción y monto"""
+    def _log(self, msg: str):
+        """Acumula líneas de log y las emite en bloque para no saturar la UI"""
+        self._log_buf.append(msg)
+        if len(self._log_buf) >= self.LOG_FLUSH_EVERY:
+            self._flush_log()
+    
+    def _flush_log(self):
+        if self._log_buf:
+            self.log.emit("\n".join(self._log_buf))
+            self._log_buf.clear()
+    
+    def _open_hash_cache(self):
+        """Abre (o crea) la caché SQLite de hashes. Devuelve None si falla."""
         try:
-            fecha = str(trans.get('fecha', ''))
-            desc = str(trans.get('descripcion', '')).strip().lower()
-            monto = f"{float(trans.get('monto', 0)):.2f}"
-            
-            raw = f"{fecha}|{desc}|{monto}"
-            return hashlib.md5(raw.encode('utf-8')).hexdigest()
-        except Exception as e: 
-            return f"error_{id(trans)}"
+            HASH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(HASH_CACHE_PATH))
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != HASH_CACHE_VERSION:
+                conn.execute("DROP TABLE IF EXISTS h")
+                conn.execute(f"PRAGMA user_version = {HASH_CACHE_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS h("
+                "pid TEXT, did TEXT, upd TEXT, key BLOB, "
+                "PRIMARY KEY(pid, did))"
+            )
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            self._log(f"⚠️ Caché de hashes no disponible: {e}")
+            return None
+    
+    def _prune_hash_cache(self, pid: str, doc_ids: List[str]):
+        """Quita de la caché de hashes las filas de documentos ya eliminados."""
+        cache = self._open_hash_cache()
+        if cache is None:
+            return
+        try:
+            # executemany evita el límite de variables de SQLite en IN (...)
+            with cache:
+                cache.executemany(
+                    "DELETE FROM h WHERE pid = ? AND did = ?",
+                    [(pid, did) for did in doc_ids],
+                )
+        except sqlite3.Error as e:
+            self._log(f"⚠️ No se pudo limpiar la caché de hashes: {e}")
+        finally:
+            cache.close()
+    
+    def _compute_missing_keys(self, rows: List[Tuple]) -> List[bytes]:
+        """Calcula claves; en paralelo si hay suficientes filas para compensar"""
+        if len(rows) < PARALLEL_MIN_ROWS:
+            return _compute_keys(rows)
+        
+        n_cpu = os.cpu_count() or 1
+        size = -(-len(rows) // n_cpu)
+        chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+        self._log(f"⚙️ Calculando {len(rows)} claves en {len(chunks)} procesos...")
+        # spawn: hacer fork desde un QThread no es seguro
+        with multiprocessing.get_context('spawn').Pool(len(chunks)) as pool:
+            partials = pool.map(_compute_keys, chunks)
+        return [key for part in partials for key in part]
     
     def run(self):
         try:
-            self.log.emit("📂 Obteniendo transacciones del proyecto...")
+            self._log("📂 Obteniendo transacciones del proyecto...")
             
             # Obtener todas las transacciones del proyecto
             trans_ref = (
@@ -68,102 +183,208 @@ class CleanupWorker(QThread):
                 .collection('transacciones')
             )
             
-            docs = list(trans_ref.stream())
-            total = len(docs)
+            # Para el análisis solo se descargan los campos que usa el hash;
+            # trans_ref se conserva completo para las eliminaciones
+            trans_query = trans_ref.select(['fecha', 'descripcion', 'monto'])
             
-            self.log.emit(f"📊 Total de transacciones:   {total}")
-            self.log.emit("")
+            total = 0
             
-            if total == 0:
-                self. log.emit("⚠️ No hay transacciones en este proyecto")
-                self.finished.emit(0, 0)
-                return
+            self._log("🔍 Analizando duplicados...")
             
-            # Agrupar por hash
-            hash_groups = defaultdict(list)
+            # Hashes ya calculados en ejecuciones anteriores (se abre aquí y no
+            # en __init__ porque la conexión debe usarse en el hilo del worker)
+            pid = str(self.proyecto_id)
+            cache = self._open_hash_cache()
+            cached = {}
+            if cache is not None:
+                cached = {
+                    (did, upd): key
+                    for did, upd, key in cache.execute(
+                        "SELECT did, upd, key FROM h WHERE pid = ?", (pid,)
+                    )
+                }
             
-            self.log.emit("🔍 Analizando duplicados...")
+            # Del stream solo se guardan listas paralelas de ids, claves y
+            # (fecha, monto, descripcion); las claves que faltan en caché se
+            # calculan después, en bloque
+            ids = []
+            metas = []
+            keys = []
+            missing = []      # índices de filas sin clave en caché
+            updates = []      # update_time de cada fila sin clave
             
-            for i, doc in enumerate(docs):
+            # Referencias locales para evitar búsquedas de atributos por fila
+            add_id = ids.append
+            add_meta = metas.append
+            add_key = keys.append
+            get = dict.get
+            lookup = cached.get
+            emit_progress = self.progress.emit
+            progress_every = self.PROGRESS_EVERY
+            
+            for i, doc in enumerate(trans_query.stream()):
                 if not self._is_running:
-                    self.log.emit("⚠️ Proceso cancelado por el usuario")
+                    self._log("⚠️ Proceso cancelado por el usuario")
+                    self._flush_log()
+                    if cache is not None:
+                        cache.close()
                     return
                 
                 data = doc.to_dict()
-                data['_doc_id'] = doc.id
                 
-                h = self._generate_hash(data)
-                hash_groups[h].append(data)
+                add_id(doc.id)
+                add_meta((
+                    get(data, 'fecha'),
+                    get(data, 'monto'),
+                    get(data, 'descripcion', ''),
+                ))
+                upd = str(doc.update_time)
+                h = lookup((doc.id, upd))
+                if h is None:
+                    missing.append(i)
+                    updates.append(upd)
+                add_key(h)
+                total = i + 1
                 
-                self.progress.emit(i + 1, total)
+                # Total desconocido hasta terminar el stream: progreso indeterminado
+                if total % progress_every == 0:
+                    emit_progress(total, 0)
+            
+            emit_progress(total, total)
+            
+            new_entries = []
+            if missing:
+                computed = self._compute_missing_keys(
+                    [(ids[i], metas[i]) for i in missing]
+                )
+                for i, upd, h in zip(missing, updates, computed):
+                    keys[i] = h
+                    if not h.startswith(b'error_'):
+                        new_entries.append((pid, ids[i], upd, h))
+            
+            if cache is not None:
+                try:
+                    if new_entries:
+                        with cache:
+                            cache.executemany(
+                                "INSERT OR REPLACE INTO h(pid, did, upd, key) "
+                                "VALUES (?, ?, ?, ?)",
+                                new_entries,
+                            )
+                except sqlite3.Error as e:
+                    self._log(f"⚠️ No se pudo actualizar la caché de hashes: {e}")
+                finally:
+                    cache.close()
+            
+            # Agrupar en el orden del stream, para que el documento que se
+            # mantiene no dependa de qué claves venían de la caché.
+            # first_seen guarda el índice de la primera aparición de cada
+            # clave; solo las claves repetidas llegan a tener grupo (lista de
+            # doc_ids) en dup_groups y datos para mostrar en first_meta
+            first_seen = {}
+            dup_groups: Dict[bytes, List[str]] = {}
+            first_meta: Dict[bytes, Tuple] = {}
+            seen = first_seen.setdefault
+            groups = dup_groups
+            for i, h in enumerate(keys):
+                first = seen(h, i)
+                if first != i:
+                    group = groups.get(h)
+                    if group is None:
+                        groups[h] = [ids[first], ids[i]]
+                        first_meta[h] = metas[first]
+                    else:
+                        group.append(ids[i])
+            del ids, metas, keys, first_seen
+            
+            self._log(f"📊 Total de transacciones:   {total}")
+            self._log("")
+            
+            if total == 0:
+                self._log("⚠️ No hay transacciones en este proyecto")
+                self._flush_log()
+                self.finished.emit(0, 0)
+                return
             
             # Encontrar duplicados
             duplicates_found = 0
             docs_to_delete = []
             
-            self.log.emit("")
-            self.log.emit("=" * 70)
-            self.log.emit("DUPLICADOS ENCONTRADOS:")
-            self.log.emit("=" * 70)
+            self._log("")
+            self._log("=" * 70)
+            self._log("DUPLICADOS ENCONTRADOS:")
+            self._log("=" * 70)
             
-            for h, group in hash_groups.items():
-                if len(group) > 1:
-                    duplicates_found += 1
-                    
-                    # Mantener el primero, marcar el resto para eliminar
-                    keep = group[0]
-                    delete = group[1:]
-                    
-                    self.log.emit(f"\n🔁 Duplicado #{duplicates_found}:")
-                    self.log.emit(f"   📅 Fecha: {keep. get('fecha')}")
-                    self.log. emit(f"   💰 Monto: {keep.get('monto')}")
-                    self.log.emit(f"   📝 Descripción:  {keep.get('descripcion', '')[:60]}...")
-                    self.log.emit(f"   🔢 Apariciones: {len(group)}")
-                    self.log.emit(f"   ✅ Mantener: {keep['_doc_id']}")
-                    
-                    for dup in delete:
-                        self.log.emit(f"   ❌ Eliminar:  {dup['_doc_id']}")
-                        docs_to_delete.append(dup['_doc_id'])
-            
-            self.log.emit("")
-            self.log.emit("=" * 70)
-            self.log.emit(f"📊 RESUMEN:")
-            self.log. emit(f"   Total transacciones: {total}")
-            self.log.emit(f"   Grupos duplicados: {duplicates_found}")
-            self.log.emit(f"   Documentos a eliminar: {len(docs_to_delete)}")
-            self.log.emit("=" * 70)
-            self.log.emit("")
+            for h, group in dup_groups.items():
+                duplicates_found += 1
+                
+                # Mantener el primero, marcar el resto para eliminar
+                keep_id = group[0]
+                fecha, monto, descripcion = first_meta[h]
+                delete = group[1:]
+                
+                self._log(f"\n🔁 Duplicado #{duplicates_found}:")
+                self._log(f"   📅 Fecha: {fecha}")
+                self._log(f"   💰 Monto: {monto}")
+                self._log(f"   📝 Descripción:  {(descripcion or '')[:60]}...")
+                self._log(f"   🔢 Apariciones: {len(group)}")
+                self._log(f"   ✅ Mantener: {keep_id}")
+                
+                for dup_id in delete:
+                    self._log(f"   ❌ Eliminar:  {dup_id}")
+                    docs_to_delete.append(dup_id)
+            
+            self._log("")
+            self._log("=" * 70)
+            self._log(f"📊 RESUMEN:")
+            self._log(f"   Total transacciones: {total}")
+            self._log(f"   Grupos duplicados: {duplicates_found}")
+            self._log(f"   Documentos a eliminar: {len(docs_to_delete)}")
+            self._log("=" * 70)
+            self._log("")
             
             # Eliminar duplicados (si no es dry run)
             deleted_count = 0
+            deleted_ids = []
             
             if not self.dry_run and docs_to_delete:
-                self.log.emit("🗑️ Eliminando duplicados...")
+                self._log("🗑️ Eliminando duplicados...")
+                self._flush_log()
+                
+                refs = [trans_ref.document(d) for d in docs_to_delete]
                 
-                for i, doc_id in enumerate(docs_to_delete):
+                for i, (doc_id, ref) in enumerate(zip(docs_to_delete, refs)):
                     if not self._is_running:
-                        self.log.emit("⚠️ Eliminación cancelada")
+                        self._log("⚠️ Eliminación cancelada")
                         break
                     
                     try:
-                        trans_ref.document(doc_id).delete()
+                        ref.delete()
                         deleted_count += 1
-                        self.log.emit(f"   ✅ Eliminado:  {doc_id}")
+                        deleted_ids.append(doc_id)
+                        self._log(f"   ✅ Eliminado:  {doc_id}")
                     except Exception as e:
-                        self.log.emit(f"   ❌ Error eliminando {doc_id}: {e}")
+                        self._log(f"   ❌ Error eliminando {doc_id}: {e}")
                     
-                    self.progress.emit(i + 1, len(docs_to_delete))
+                    done = i + 1
+                    if done % self.PROGRESS_EVERY == 0 or done == len(refs):
+                        self.progress.emit(done, len(refs))
                 
-                self.log.emit("")
-                self.log.emit(f"✅ Eliminados {deleted_count} documentos duplicados")
+                if deleted_ids:
+                    self._prune_hash_cache(pid, deleted_ids)
+                
+                self._log("")
+                self._log(f"✅ Eliminados {deleted_count} documentos duplicados")
             
             elif self.dry_run and docs_to_delete:
-                self.log.emit("ℹ️ MODO SIMULACIÓN - No se eliminó nada")
-                self.log.emit("ℹ️ Ejecuta en modo REAL para eliminar duplicados")
+                self._log("ℹ️ MODO SIMULACIÓN - No se eliminó nada")
+                self._log("ℹ️ Ejecuta en modo REAL para eliminar duplicados")
             
+            self._flush_log()
             self.finished.emit(duplicates_found, deleted_count)
             
         except Exception as e:
+            self._flush_log()
             self. error.emit(str(e))
 
 
@@ -264,15 +485,24 @@ class DuplicateCleanerDialog(QDialog):
         try:
             self.log(f"📂 Cargando credenciales desde: {filepath}")
             
-            # Inicializar Firebase (eliminar app anterior si existe)
-            try:
-                firebase_admin.delete_app(firebase_admin.get_app())
-            except ValueError:
-                pass
+            fingerprint = _credentials_fingerprint(filepath)
+            cached = _FIREBASE_APPS.get(fingerprint)
             
-            cred = credentials.Certificate(filepath)
-            firebase_admin.initialize_app(cred)
-            self.db = firestore.client()
+            if cached is not None:
+                # Mismas credenciales: reutilizar app y canales gRPC abiertos
+                self.db = cached[1]
+            else:
+                # Inicializar Firebase (eliminar app anterior si existe)
+                try:
+                    firebase_admin.delete_app(firebase_admin.get_app())
+                except ValueError:
+                    pass
+                _FIREBASE_APPS.clear()
+                
+                cred = credentials.Certificate(filepath)
+                app = firebase_admin.initialize_app(cred)
+                self.db = firestore.client(app)
+                _FIREBASE_APPS[fingerprint] = (app, self.db)
             
             self.log("✅ Credenciales cargadas exitosamente")
             self.lbl_creds_status.setText(f"✅ {Path(filepath).name}")
@@ -420,6 +650,7 @@ class DuplicateCleanerDialog(QDialog):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     dialog = DuplicateCleanerDialog()
@@ -181,12 +181,13 @@ class FirebaseExplorerDialog(QDialog):
             for c in subs:
                 sub_item = QListWidgetItem(c.id)
                 # Intentar mostrar un ejemplo de documento
+                # (solo se pide un documento: limit(1) en vez de abrir un stream)
                 example = None
                 try:
-                    for doc in c.stream():
-                        example = doc.to_dict()
-                        doc_id = doc.id
-                        break
+                    snaps = list(c.limit(1).get())
+                    if snaps:
+                        example = snaps[0].to_dict()
+                        doc_id = snaps[0].id
                 except Exception as inner_e:
                     example = f"Error al leer documentos: {inner_e}"
 
@@ -8,12 +8,21 @@ Run with: python progain4/main_ynab.py
 
 import sys
 import os
+import re
 import logging
 import json
+import importlib
+import importlib.util
+import threading
 from typing import Optional
 
+try:
+    import orjson  # opcional: decodificador JSON más rápido
+except ImportError:
+    orjson = None
+
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QCoreApplication, QThread, pyqtSignal
 
 # ---------------------------------------------------------------------------
 # Ensure project root is on sys.path so that `import progain4.*` works
@@ -22,33 +31,107 @@ from PyQt6.QtCore import Qt
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))          # . ../PROGRAIN-5.0/progain4
 PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                       # .../PROGRAIN-5.0
 
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
+# Se añade al final (no al principio) para que los imports de stdlib y
+# site-packages no tengan que sondear primero la raíz del proyecto.
+# Importado como progain4.main_ynab (__package__ definido) la raíz ya está
+# en sys.path y no hace falta recorrerlo.
+if not __package__ and PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
-from progain4.services.firebase_client import FirebaseClient
 from progain4.services.config import ConfigManager
-from progain4.ui.dialogs.firebase_config_dialog import FirebaseConfigDialog
-from progain4.ui.dialogs.project_dialog import ProjectDialog
-from progain4.ui.main_window4 import MainWindow4
 
-# Import theme manager
-try:
-    from progain4.ui.theme_manager_improved import theme_manager
-    logger_temp = logging.getLogger(__name__)
-    logger_temp.info("Using improved theme manager")
-except ImportError:  
-    from progain4.ui import theme_manager
-    logger_temp = logging.getLogger(__name__)
-    logger_temp.info("Using standard theme manager")
-
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# firebase_client (y con él el Admin SDK de Firebase) se importa en segundo
+# plano al arrancar; ver _start_preload().
+# Los diálogos, la ventana principal y el theme manager arrastran grafos de
+# imports grandes de Qt: se importan dentro de los métodos que los usan para
+# no pagar ese coste antes de que la aplicación arranque.
+
+
+# El logging se configura en main() (ver _configure_logging): importar este
+# módulo desde otras herramientas no instala handlers.
 logger = logging.getLogger(__name__)
 
+# Campos obligatorios de un JSON de cuenta de servicio de Firebase
+_REQUIRED_CRED_FIELDS = frozenset((
+    'type', 'project_id', 'private_key_id', 'private_key',
+    'client_email', 'client_id', 'auth_uri', 'token_uri',
+))
+
+# Errores de Firebase que indican credenciales inválidas (vs. conectividad)
+_AUTH_ERROR_RE = re.compile(r"invalid|signature|jwt", re.IGNORECASE)
+
+# Prefijo del mensaje de error cuando el archivo de credenciales no existe
+_CREDS_NOT_FOUND = "El archivo no existe"
+
+# Módulos pesados que se importan en un hilo aparte mientras arranca la app
+_PRELOAD_MODULES = (
+    "progain4.services.firebase_client",
+)
+
+_theme_manager = None
+
+
+def _configure_logging():
+    """
+    Configura el logging de la aplicación (nivel ajustable con PROGAIN_LOG,
+    p.ej. PROGAIN_LOG=WARNING). Solo se instala un handler si nadie
+    configuró logging antes.
+    """
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=getattr(logging, os.environ.get("PROGAIN_LOG", "INFO").upper(), logging.INFO),
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        )
+
+
+def _start_preload():
+    """Importa _PRELOAD_MODULES en un hilo daemon (sin crear objetos de Qt)."""
+    def _worker():
+        for module_name in _PRELOAD_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                # El import real (en el hilo principal) reportará el error
+                logger.debug("Preload of %s failed: %s", module_name, e)
+
+    threading.Thread(target=_worker, name="progain-preload", daemon=True).start()
+
+
+def _get_theme_manager():
+    """Importa el theme manager la primera vez que se necesita."""
+    global _theme_manager
+    if _theme_manager is None:
+        # find_spec en vez de try/except ImportError: un ImportError real
+        # dentro de theme_manager_improved no debe ocultarse con el fallback
+        if importlib.util.find_spec("progain4.ui.theme_manager_improved") is not None:
+            from progain4.ui.theme_manager_improved import theme_manager
+            logger.info("Using improved theme manager")
+        else:
+            from progain4.ui import theme_manager
+            logger.info("Using standard theme manager")
+        _theme_manager = theme_manager
+    return _theme_manager
+
+
+class _StylesheetBuilder(QThread):
+    """Genera el QSS de un tema fuera del hilo de la GUI."""
+
+    built = pyqtSignal(str, str)   # (tema resuelto, qss)
+    failed = pyqtSignal(str, str)  # (tema pedido, mensaje de error)
+
+    def __init__(self, theme_manager, theme_name: str):
+        super().__init__()
+        self._theme_manager = theme_manager
+        self._theme_name = theme_name
+
+    def run(self):
+        try:
+            theme_name, qss = self._theme_manager.build_stylesheet(self._theme_name)
+        except Exception as e:
+            self.failed.emit(self._theme_name, str(e))
+        else:
+            self.built.emit(theme_name, qss)
+
 
 class PROGRAIN4App:  
     """
@@ -60,8 +143,60 @@ class PROGRAIN4App:
     - Main window creation
     """
 
+    __slots__ = (
+        "app",
+        "firebase_client",
+        "main_window",
+        "config_manager",
+        "_creds_cache",
+        "_theme_builder",
+        "_last_saved_project",
+        # PyQt guarda una referencia débil al receptor al conectar señales
+        # a métodos (project_changed, _StylesheetBuilder)
+        "__weakref__",
+    )
+
     def __init__(self):
         """Initialize the application"""
+        # El import del SDK de Firebase se solapa con la carga de configuración,
+        # la creación de la QApplication y la validación de credenciales
+        _start_preload()
+
+        # QApplication se crea bajo demanda (ver _ensure_qapp) para que los
+        # caminos que no muestran UI no paguen la inicialización de Qt.
+        self.app: Optional[QApplication] = None
+        self._theme_builder: Optional[_StylesheetBuilder] = None
+        # (id, nombre) escritos por última vez en la configuración
+        self._last_saved_project: Optional[tuple[str, str]] = None
+
+        self.firebase_client:  Optional["FirebaseClient"] = None
+        self.main_window: Optional["MainWindow4"] = None
+        self.config_manager = ConfigManager()
+        # Una sola lectura del INI; los getters usados al arrancar salen de aquí
+        self.config_manager.load_all()
+        
+        # (abspath, mtime_ns, size) -> (is_valid, error_message, creds)
+        self._creds_cache: dict[tuple, tuple] = {}
+
+    def _ensure_qapp(self) -> QApplication:
+        """
+        Crea la QApplication (y aplica el tema) la primera vez que se necesita UI.
+
+        Returns:
+            La instancia de QApplication
+        """
+        if self.app is not None:
+            return self.app
+
+        # Atributos que deben fijarse antes de crear la QApplication
+        # (solo se ejecuta una vez, al arrancar).
+        # Los dashboards importan PyQt6.QtWebEngineWidgets al cargar
+        # main_window4, que ahora se importa después de crear la QApplication:
+        # QtWebEngine exige este atributo antes de crearla.
+        QCoreApplication.setAttribute(
+            Qt.ApplicationAttribute.AA_ShareOpenGLContexts, True
+        )
+
         self.app = QApplication(sys.argv)
 
         # High DPI: 
@@ -72,82 +207,137 @@ class PROGRAIN4App:
         self.app.setApplicationVersion("5.0.0")
         self.app.setOrganizationName("PROGRAIN")
         self.app.setOrganizationDomain("prograin. com")
-
-        self.firebase_client:  Optional[FirebaseClient] = None
-        self.main_window: Optional[MainWindow4] = None
-        self.config_manager = ConfigManager()
         
         # --- APLICACIÓN DEL TEMA ---
+        # Se difiere al primer ciclo del event loop para que el parseo del
+        # stylesheet no bloquee antes de mostrar la primera ventana.
+        self._apply_startup_theme()
+
+        return self.app
+
+    def _apply_startup_theme(self):
+        """
+        Aplica el tema guardado (o 'light' por defecto) a la QApplication.
+
+        El QSS se genera en un QThread y solo setStyleSheet corre en el hilo
+        de la GUI (las señales entre hilos llegan encoladas).
+        """
         # Recuperamos la configuración guardada (ej: "light", "dark", "midnight", "coral")
         saved_theme = self.config_manager.get_theme()
         theme_to_apply = saved_theme if saved_theme else "light"
-        
-        # Aplicamos el tema
+
+        theme_manager = _get_theme_manager()
+        if not hasattr(theme_manager, "build_stylesheet"):
+            # Theme manager estándar: aplicación síncrona en la siguiente vuelta del event loop
+            QTimer.singleShot(0, lambda: self._apply_theme_sync(theme_to_apply))
+            return
+
+        builder = _StylesheetBuilder(theme_manager, theme_to_apply)
+        builder.built.connect(self._on_stylesheet_built)
+        builder.failed.connect(self._on_stylesheet_failed)
+        # El QThread se destruye con deleteLater (en el event loop, cuando
+        # run() ya terminó del todo) y solo entonces se suelta la referencia
+        builder.finished.connect(builder.deleteLater)
+        builder.destroyed.connect(self._on_theme_builder_destroyed)
+        # Mantener la referencia mientras el hilo está vivo
+        self._theme_builder = builder
+        builder.start()
+
+    def _on_stylesheet_built(self, theme_name: str, qss: str):
+        """Aplica en el hilo de la GUI el QSS generado por _StylesheetBuilder."""
         try:
-            theme_manager.apply_theme(self.app, theme_to_apply)
-            logger.info(f"Applied theme at startup: {theme_to_apply}")
-        except Exception as e:  
-            logger.warning(f"Could not apply theme '{theme_to_apply}': {e}. Using default.")
-            try:
-                theme_manager.apply_theme(self.app, "light")
-            except:  
-                logger.error("Could not apply default theme")
+            _get_theme_manager().apply_stylesheet(self.app, theme_name, qss)
+            logger.info("Applied theme at startup: %s", theme_name)
+        except Exception as e:
+            self._on_stylesheet_failed(theme_name, str(e))
+
+    def _on_stylesheet_failed(self, theme_name: str, error: str):
+        logger.warning("Could not apply theme '%s': %s. Using default.", theme_name, error)
+        try:
+            _get_theme_manager().apply_theme(self.app, "light")
+        except Exception:
+            logger.error("Could not apply default theme")
+
+    def _on_theme_builder_destroyed(self):
+        self._theme_builder = None
+
+    def _wait_theme_builder(self):
+        """Espera a que termine el hilo del tema antes de salir de run()."""
+        builder = self._theme_builder
+        if builder is None:
+            return
+        try:
+            builder.wait()
+        except RuntimeError:
+            # El objeto C++ ya fue destruido
+            pass
+        self._theme_builder = None
+
+    def _apply_theme_sync(self, theme_name: str):
+        """Aplica el tema en el hilo de la GUI (theme managers sin build_stylesheet)."""
+        try:
+            _get_theme_manager().apply_theme(self.app, theme_name)
+            logger.info("Applied theme at startup: %s", theme_name)
+        except Exception as e:
+            self._on_stylesheet_failed(theme_name, str(e))
 
     def run(self) -> int:
         """
         Run the application.  
 
+        Las excepciones no controladas las muestra _excepthook (instalado en
+        main()), igual que las que ocurren dentro de callbacks de Qt.
+
         Returns:
             Exit code
         """
-        try:
-            # Step 1: Initialize Firebase with validation
-            if not self.initialize_firebase():
-                logger.error("Failed to initialize Firebase")
-                return 1
-
-            # Step 2: Select or load last project (SIN DIÁLOGO INICIAL)
-            proyecto_id, proyecto_nombre = self.select_project()
-            if not proyecto_id: 
-                logger.info("No project available, exiting")
-                return 0
-
-            # Step 3: Create and show main window
-            self.main_window = MainWindow4(
-                self.firebase_client,
-                proyecto_id,
-                proyecto_nombre,
-                self.config_manager,
-            )
-            
-            # ✅ CORREGIDO: Guardar cuando CAMBIA de proyecto (no al cerrar)
-            # Conectar señal de cambio de proyecto
-            self.main_window.project_changed.connect(self._on_project_changed)
-            
-            self.main_window.show()
+        # Step 1: Initialize Firebase with validation
+        if not self.initialize_firebase():
+            logger.error("Failed to initialize Firebase")
+            self._wait_theme_builder()
+            return 1
 
-            logger.info(f"Application ready - Project: {proyecto_nombre} ({proyecto_id})")
+        # Step 2: Select or load last project (SIN DIÁLOGO INICIAL)
+        proyecto_id, proyecto_nombre = self.select_project()
+        if not proyecto_id: 
+            logger.info("No project available, exiting")
+            self._wait_theme_builder()
+            return 0
 
-            # Step 4: Run event loop
-            exit_code = self.app.exec()
-            
-            # ✅ NUEVO: Guardar proyecto al salir (antes de que se destruya QSettings)
-            if self.main_window and hasattr(self.main_window, 'current_proyecto_id'):
-                self._save_last_project(
-                    self.main_window. current_proyecto_id,
-                    self.main_window.current_proyecto_nombre
-                )
-            
-            return exit_code
+        # Step 3: Create and show main window
+        self._ensure_qapp()
+        from progain4.ui.main_window4 import MainWindow4
+        
+        self.main_window = MainWindow4(
+            self.firebase_client,
+            proyecto_id,
+            proyecto_nombre,
+            self.config_manager,
+        )
+        
+        # ✅ CORREGIDO: Guardar cuando CAMBIA de proyecto (no al cerrar)
+        # Conectar señal de cambio de proyecto
+        self.main_window.project_changed.connect(self._on_project_changed)
+        
+        self.main_window.show()
 
-        except Exception as e:
-            logger.exception("Unexpected error: %s", e)
-            QMessageBox.critical(
-                None,
-                "Error Fatal",
-                f"Error inesperado en la aplicación:\n{str(e)}",
+        logger.info("Application ready - Project: %s (%s)", proyecto_nombre, proyecto_id)
+
+        # Step 4: Run event loop
+        exit_code = self.app.exec()
+        self._wait_theme_builder()
+        
+        # ✅ NUEVO: Guardar proyecto al salir (antes de que se destruya QSettings)
+        if self.main_window and hasattr(self.main_window, 'current_proyecto_id'):
+            self._save_last_project(
+                self.main_window. current_proyecto_id,
+                self.main_window.current_proyecto_nombre
             )
-            return 1
+        
+        # El event loop ya terminó: el sync diferido no se dispararía
+        self.config_manager.flush()
+        
+        return exit_code
 
     def _on_project_changed(self, proyecto_id: str, proyecto_nombre: str):
         """
@@ -157,13 +347,18 @@ class PROGRAIN4App:
             proyecto_id: ID del nuevo proyecto
             proyecto_nombre:  Nombre del nuevo proyecto
         """
-        logger.info(f"Project changed to: {proyecto_nombre} ({proyecto_id})")
+        logger.info("Project changed to: %s (%s)", proyecto_nombre, proyecto_id)
         self._save_last_project(proyecto_id, proyecto_nombre)
 
     def _validate_credentials_file(self, credentials_path: str) -> tuple[bool, str]:
         """
         Valida que el archivo de credenciales sea un JSON válido y tenga la estructura correcta.
         
+        El resultado se memoriza por (ruta, mtime, tamaño): durante el arranque
+        el mismo archivo puede validarse varias veces y solo se parsea una.
+        Además, la firma de la última validación correcta se guarda en el INI,
+        así que entre ejecuciones un archivo sin cambios no vuelve a parsearse.
+        
         Args:
             credentials_path:  Ruta al archivo de credenciales
             
@@ -171,43 +366,91 @@ class PROGRAIN4App:
             Tuple (is_valid, error_message)
         """
         try: 
-            if not os.path.exists(credentials_path):
-                return False, f"El archivo no existe: {credentials_path}"
+            # Un solo stat: si el archivo no existe, os.stat lo indica
+            try:
+                st = os.stat(credentials_path)
+            except FileNotFoundError:
+                return False, f"{_CREDS_NOT_FOUND}: {credentials_path}"
+            
+            key = (os.path.abspath(credentials_path), st.st_mtime_ns, st.st_size)
+            cached = self._creds_cache.get(key)
+            if cached is None:
+                # Firma persistida en el INI: si el archivo no cambió desde la
+                # última validación correcta (en otra ejecución), no se parsea
+                signature = "|".join(str(part) for part in key)
+                sig_key = ConfigManager.KEY_FIREBASE_CREDENTIALS_SIG
+                if self.config_manager.get(sig_key) == signature:
+                    logger.info("Credentials file unchanged since last validation: %s", credentials_path)
+                    cached = (True, "", None)
+                else:
+                    cached = self._check_credentials_file(credentials_path)
+                    if cached[0]:
+                        self.config_manager.set(sig_key, signature)
+                self._creds_cache[key] = cached
+            
+            is_valid, error_msg, _ = cached
+            return is_valid, error_msg
             
+        except Exception as e:
+            return False, f"Error al validar credenciales: {str(e)}"
+
+    def _get_validated_credentials(self, credentials_path: str) -> Optional[dict]:
+        """
+        Devuelve el JSON de credenciales ya parseado por _validate_credentials_file,
+        o None si no está en caché (o no era válido).
+        """
+        try:
+            st = os.stat(credentials_path)
+        except OSError:
+            return None
+        key = (os.path.abspath(credentials_path), st.st_mtime_ns, st.st_size)
+        cached = self._creds_cache.get(key)
+        return cached[2] if cached is not None else None
+
+    def _check_credentials_file(self, credentials_path: str) -> tuple[bool, str, Optional[dict]]:
+        """
+        Parsea y valida el archivo de credenciales (sin caché).
+        
+        Returns:
+            Tuple (is_valid, error_message, creds) - creds es None si no es válido
+        """
+        try: 
             # Verificar que sea un archivo JSON válido
-            with open(credentials_path, 'r', encoding='utf-8') as f:
-                creds = json.load(f)
-            
-            # Validar campos requeridos
-            required_fields = [
-                'type', 'project_id', 'private_key_id', 'private_key',
-                'client_email', 'client_id', 'auth_uri', 'token_uri'
-            ]
-            
-            missing_fields = [field for field in required_fields if field not in creds]
-            
-            if missing_fields:
-                return False, f"Campos faltantes en credenciales: {', '.join(missing_fields)}"
+            # (orjson.JSONDecodeError hereda de json.JSONDecodeError)
+            with open(credentials_path, 'rb') as f:
+                if orjson is not None:
+                    creds = orjson.loads(f.read())
+                else:
+                    creds = json.load(f)
+            
+            if not isinstance(creds, dict):
+                return False, "El archivo de credenciales no contiene un objeto JSON", None
+
+            # Validar campos requeridos (comparación de conjuntos en C; la
+            # diferencia solo se calcula si falta alguno)
+            if not creds.keys() >= _REQUIRED_CRED_FIELDS:
+                missing_fields = _REQUIRED_CRED_FIELDS - creds.keys()
+                return False, f"Campos faltantes en credenciales: {', '.join(sorted(missing_fields))}", None
             
             # Validar que private_key tenga el formato correcto
             private_key = creds.get('private_key', '')
             if '\\n' not in private_key and '\n' not in private_key: 
-                return False, "El campo 'private_key' no tiene el formato correcto (falta \\n)"
+                return False, "El campo 'private_key' no tiene el formato correcto (falta \\n)", None
             
             # Validar que sea una cuenta de servicio
             if creds.get('type') != 'service_account':
-                return False, f"Tipo de credencial inválido: {creds.get('type')} (debe ser 'service_account')"
+                return False, f"Tipo de credencial inválido: {creds.get('type')} (debe ser 'service_account')", None
             
-            logger.info(f"✅ Credentials file validated:  {credentials_path}")
-            logger.info(f"   Project ID: {creds.get('project_id')}")
-            logger.info(f"   Client Email: {creds.get('client_email')}")
+            logger.info("✅ Credentials file validated:  %s", credentials_path)
+            logger.info("   Project ID: %s", creds.get('project_id'))
+            logger.info("   Client Email: %s", creds.get('client_email'))
             
-            return True, ""
+            return True, "", creds
             
         except json.JSONDecodeError as e:
-            return False, f"Archivo JSON inválido: {str(e)}"
+            return False, f"Archivo JSON inválido: {str(e)}", None
         except Exception as e:
-            return False, f"Error al validar credenciales: {str(e)}"
+            return False, f"Error al validar credenciales: {str(e)}", None
 
     def initialize_firebase(self) -> bool:
         """
@@ -219,17 +462,17 @@ class PROGRAIN4App:
             True if initialization successful, False otherwise
         """
         logger.info("Initializing Firebase...")
-
+        
         credentials_path = None
         storage_bucket = None
         
         # Intentar obtener credenciales desde múltiples fuentes
         
         # Priority 1: environment variables (útil para desarrollo/testing)
-        env_credentials = os.environ.get("FIREBASE_CREDENTIALS", "")
-        env_bucket = os.environ.get("FIREBASE_STORAGE_BUCKET", "")
+        env_credentials = os.environ.get("FIREBASE_CREDENTIALS")
+        env_bucket = os.environ.get("FIREBASE_STORAGE_BUCKET") if env_credentials else None
 
-        if env_credentials and env_bucket and os.path.exists(env_credentials):
+        if env_credentials and env_bucket:
             logger.info("Using Firebase credentials from environment variables")
             
             # ✅ VALIDAR CREDENCIALES
@@ -238,8 +481,11 @@ class PROGRAIN4App:
             if is_valid:
                 credentials_path = env_credentials
                 storage_bucket = env_bucket
+            elif error_msg.startswith(_CREDS_NOT_FOUND):
+                logger.warning("Environment credentials file not found: %s", env_credentials)
             else:
-                logger.warning(f"Environment credentials invalid: {error_msg}")
+                logger.warning("Environment credentials invalid: %s", error_msg)
+                self._ensure_qapp()
                 QMessageBox.warning(
                     None,
                     "Credenciales Inválidas",
@@ -252,51 +498,42 @@ class PROGRAIN4App:
             saved_credentials, saved_bucket = self. config_manager.get_firebase_config()
 
             if saved_credentials and saved_bucket:
-                # Validar que el archivo exista
-                if os.path.exists(saved_credentials):
-                    logger.info("Validating saved Firebase credentials...")
+                logger.info("Validating saved Firebase credentials...")
+                
+                # ✅ VALIDAR CREDENCIALES GUARDADAS
+                is_valid, error_msg = self._validate_credentials_file(saved_credentials)
+                
+                if is_valid:
+                    logger.info("Using Firebase credentials from saved configuration")
+                    credentials_path = saved_credentials
+                    storage_bucket = saved_bucket
+                elif error_msg.startswith(_CREDS_NOT_FOUND):
+                    logger.warning("Saved credentials file not found: %s", saved_credentials)
+                    # Limpiar configuración inválida
+                    self.config_manager. clear_firebase_config()
+                else:
+                    logger.warning("Saved credentials invalid:  %s", error_msg)
                     
-                    # ✅ VALIDAR CREDENCIALES GUARDADAS
-                    is_valid, error_msg = self._validate_credentials_file(saved_credentials)
+                    # Mostrar error y limpiar configuración
+                    self._ensure_qapp()
+                    QMessageBox.warning(
+                        None,
+                        "Credenciales Corruptas",
+                        f"Las credenciales guardadas están corruptas o son inválidas:\n\n{error_msg}\n\n"
+                        "Se solicitarán nuevas credenciales."
+                    )
                     
-                    if is_valid:
-                        logger.info("Using Firebase credentials from saved configuration")
-                        credentials_path = saved_credentials
-                        storage_bucket = saved_bucket
-                    else:
-                        logger.warning(f"Saved credentials invalid:  {error_msg}")
-                        
-                        # Mostrar error y limpiar configuración
-                        QMessageBox.warning(
-                            None,
-                            "Credenciales Corruptas",
-                            f"Las credenciales guardadas están corruptas o son inválidas:\n\n{error_msg}\n\n"
-                            "Se solicitarán nuevas credenciales."
-                        )
-                        
-                        # Limpiar configuración inválida
-                        self.config_manager.clear_firebase_config()
-                else:  
-                    logger.warning(f"Saved credentials file not found: {saved_credentials}")
                     # Limpiar configuración inválida
-                    self.config_manager. clear_firebase_config()
+                    self.config_manager.clear_firebase_config()
 
         # Si no hay credenciales válidas, mostrar diálogo
         if not credentials_path or not storage_bucket:
             logger.info("No valid credentials found, showing configuration dialog")
+            self._ensure_qapp()
             
-            # Mostrar mensaje informativo
-            QMessageBox.information(
-                None,
-                "Configuración de Firebase",
-                "Bienvenido a PROGRAIN 5.0\n\n"
-                "Para comenzar, necesitas configurar la conexión con Firebase.\n\n"
-                "En el siguiente diálogo, selecciona el archivo de credenciales "
-                "JSON descargado desde Firebase Console.\n\n"
-                "📥 Descarga credenciales desde:\n"
-                "https://console.firebase.google.com/ → Configuración → Cuentas de servicio"
-            )
-
+            # Sin modal de bienvenida: FirebaseConfigDialog ya explica de dónde
+            # descargar las credenciales, así que se abre directamente.
+            from progain4.ui.dialogs.firebase_config_dialog import FirebaseConfigDialog
             dialog = FirebaseConfigDialog(parent=None, config_manager=self.config_manager)
 
             if dialog.exec() != FirebaseConfigDialog.DialogCode.Accepted:
@@ -327,26 +564,34 @@ class PROGRAIN4App:
                 )
                 return False
 
+        # Se importa tras validar las credenciales para que la validación se
+        # solape con el import en segundo plano (ver _start_preload); a estas
+        # alturas normalmente ya está en sys.modules.
+        from progain4.services.firebase_client import FirebaseClient
+
         # Intentar inicializar Firebase client
         try:
-            logger.info(f"Initializing Firebase with credentials:  {credentials_path}")
-            logger.info(f"Storage bucket: {storage_bucket}")
+            logger.info("Initializing Firebase with credentials:  %s", credentials_path)
+            logger.info("Storage bucket: %s", storage_bucket)
             
             self.firebase_client = FirebaseClient()
 
-            if not self.firebase_client.initialize(credentials_path, storage_bucket):
+            if not self.firebase_client.initialize(
+                credentials_path,
+                storage_bucket,
+                credentials_info=self._get_validated_credentials(credentials_path),
+            ):
                 raise Exception("Firebase initialization returned False")
 
             logger.info("Firebase initialized successfully")
             return True
             
         except Exception as e:  
-            logger.error(f"Error initializing Firebase: {e}")
+            logger.error("Error initializing Firebase: %s", e)
+            self._ensure_qapp()
             
             # Determinar si el error es por credenciales o por conectividad
-            error_msg = str(e).lower()
-            
-            if 'invalid' in error_msg or 'signature' in error_msg or 'jwt' in error_msg:
+            if _AUTH_ERROR_RE.search(str(e)):
                 # Error de credenciales
                 dialog_msg = (
                     f"Las credenciales de Firebase son inválidas:\n\n{str(e)}\n\n"
@@ -386,6 +631,7 @@ class PROGRAIN4App:
                 self.config_manager. clear_firebase_config()
                 
                 # Mostrar diálogo de configuración
+                from progain4.ui.dialogs.firebase_config_dialog import FirebaseConfigDialog
                 dialog = FirebaseConfigDialog(parent=None, config_manager=self.config_manager)
                 
                 if dialog.exec() == FirebaseConfigDialog.DialogCode. Accepted:
@@ -406,14 +652,18 @@ class PROGRAIN4App:
                         # Reintentar inicialización
                         self.firebase_client = FirebaseClient()
                         
-                        if self.firebase_client.initialize(credentials_path, storage_bucket):
+                        if self.firebase_client.initialize(
+                            credentials_path,
+                            storage_bucket,
+                            credentials_info=self._get_validated_credentials(credentials_path),
+                        ):
                             logger.info("Firebase initialized successfully on retry")
                             return True
                         else:
                             raise Exception("Firebase initialization failed on retry")
                             
                     except Exception as e2:
-                        logger.error(f"Error on retry: {e2}")
+                        logger.error("Error on retry: %s", e2)
                         QMessageBox.critical(
                             None,
                             "Error",
@@ -435,13 +685,14 @@ class PROGRAIN4App:
             Tuple of (project_id, project_name) or (None, None) if cancelled
         """
         logger.info("Loading projects...")
-
+        
         try:
             proyectos = self. firebase_client.get_proyectos()
-            logger.info(f"Found {len(proyectos)} existing projects")
+            logger.info("Found %s existing projects", len(proyectos))
             
             if not proyectos:  
                 logger.info("No existing projects found")
+                self._ensure_qapp()
                 
                 # ✅ Solo preguntar si desea crear cuando NO hay proyectos
                 reply = QMessageBox.question(
@@ -457,6 +708,7 @@ class PROGRAIN4App:
                     return None, None
                 
                 # Mostrar diálogo para crear proyecto
+                from progain4.ui.dialogs.project_dialog import ProjectDialog
                 dialog = ProjectDialog(proyectos=[])
                 
                 if dialog.exec() != ProjectDialog.DialogCode.Accepted:
@@ -468,7 +720,7 @@ class PROGRAIN4App:
                 
                 # Crear nuevo proyecto
                 _, nombre, descripcion = result
-                logger.info(f"Creating new project: {nombre}")
+                logger.info("Creating new project: %s", nombre)
                 
                 try:  
                     proyecto_id = self.firebase_client.create_proyecto(nombre, descripcion)
@@ -476,7 +728,7 @@ class PROGRAIN4App:
                     if not proyecto_id:
                         raise Exception("create_proyecto returned None")
                     
-                    logger.info(f"Project created successfully: {proyecto_id}")
+                    logger.info("Project created successfully: %s", proyecto_id)
                     
                     # ✅ Guardar como último proyecto
                     self._save_last_project(proyecto_id, nombre)
@@ -484,7 +736,7 @@ class PROGRAIN4App:
                     return proyecto_id, nombre
                     
                 except Exception as e:
-                    logger.error(f"Error creating project: {e}")
+                    logger.error("Error creating project: %s", e)
                     QMessageBox. critical(
                         None,
                         "Error",
@@ -496,24 +748,25 @@ class PROGRAIN4App:
             last_project_id, last_project_name = self._load_last_project()
             
             if last_project_id:
-                # Verificar que el proyecto aún existe
-                proyecto_existe = any(
-                    str(p.get('id')) == str(last_project_id) 
-                    for p in proyectos
-                )
+                # Verificar que el proyecto aún existe (índice por id, una pasada)
+                # (get_proyectos ya normaliza 'id' a str; _load_last_project también)
+                proyectos_by_id: dict[str, dict] = {p['id']: p for p in proyectos}
+                proyecto = proyectos_by_id.get(last_project_id)
                 
-                if proyecto_existe:
-                    logger.info(f"Loading last used project: {last_project_name} ({last_project_id})")
+                if proyecto is not None:
+                    # Usar el nombre actual de Firebase (el guardado puede estar obsoleto)
+                    last_project_name = proyecto['nombre']
+                    logger.info("Loading last used project: %s (%s)", last_project_name, last_project_id)
                     return last_project_id, last_project_name
                 else: 
-                    logger.warning(f"Last project {last_project_id} no longer exists")
+                    logger.warning("Last project %s no longer exists", last_project_id)
             
             # ✅ FALLBACK: Cargar el primer proyecto disponible
             primer_proyecto = proyectos[0]
-            proyecto_id = str(primer_proyecto.get('id'))
-            proyecto_nombre = primer_proyecto.get('nombre', f'Proyecto {proyecto_id}')
+            proyecto_id = primer_proyecto['id']
+            proyecto_nombre = primer_proyecto['nombre']
             
-            logger.info(f"Loading first available project: {proyecto_nombre} ({proyecto_id})")
+            logger.info("Loading first available project: %s (%s)", proyecto_nombre, proyecto_id)
             
             # Guardar como último proyecto
             self._save_last_project(proyecto_id, proyecto_nombre)
@@ -521,7 +774,8 @@ class PROGRAIN4App:
             return proyecto_id, proyecto_nombre
             
         except Exception as e:  
-            logger.error(f"Error loading projects: {e}")
+            logger.error("Error loading projects: %s", e)
+            self._ensure_qapp()
             QMessageBox. critical(
                 None,
                 "Error",
@@ -546,7 +800,7 @@ class PROGRAIN4App:
             return None, None
             
         except Exception as e:
-            logger.warning(f"Error loading last project:  {e}")
+            logger.warning("Error loading last project:  %s", e)
             return None, None
 
     def _save_last_project(self, proyecto_id: str, proyecto_nombre: str):
@@ -557,32 +811,63 @@ class PROGRAIN4App:
             proyecto_id:  ID del proyecto
             proyecto_nombre: Nombre del proyecto
         """
+        # project_changed se emite por cada acción del usuario: si el
+        # proyecto no cambió no se escribe nada
+        if self._last_saved_project == (proyecto_id, proyecto_nombre):
+            return
+        
         try: 
-            self.config_manager. set('last_project_id', str(proyecto_id))
-            self.config_manager.set('last_project_name', str(proyecto_nombre))
-            logger.debug(f"Saved last project: {proyecto_nombre} ({proyecto_id})")
+            # Un solo sync del INI para ambas claves
+            if self.config_manager.set_many({
+                'last_project_id': proyecto_id,
+                'last_project_name': proyecto_nombre,
+            }):
+                self._last_saved_project = (proyecto_id, proyecto_nombre)
+            logger.debug("Saved last project: %s (%s)", proyecto_nombre, proyecto_id)
         except Exception as e:
-            logger. warning(f"Error saving last project: {e}")
+            logger. warning("Error saving last project: %s", e)
+
+
+def _excepthook(exc_type, exc, tb):
+    """
+    Manejador único de errores no controlados (arranque y callbacks de Qt):
+    los registra y muestra un diálogo de error fatal.
+    """
+    if issubclass(exc_type, KeyboardInterrupt):
+        sys.__excepthook__(exc_type, exc, tb)
+        return
+
+    logger.critical("Unexpected error: %s", exc, exc_info=(exc_type, exc, tb))
+    try:
+        # La referencia local mantiene viva la QApplication durante el diálogo
+        app = QApplication.instance() or QApplication(sys.argv)
+        QMessageBox.critical(
+            None,
+            "Error Fatal",
+            f"Error inesperado en la aplicación:\n{str(exc)}",
+        )
+    except Exception:
+        pass
+
 
 def main():
     """Main entry point"""
+    _configure_logging()
+
     logger.info("=" * 70)
     logger.info("PROGRAIN 5.0 Starting...")
     logger.info("=" * 70)
     
-    try:
-        app = PROGRAIN4App()
-        exit_code = app.run()
-        
-        logger.info("=" * 70)
-        logger.info(f"PROGRAIN 5.0 Exiting with code {exit_code}")
-        logger.info("=" * 70)
-        
-        sys.exit(exit_code)
-        
-    except Exception as e: 
-        logger.exception("Fatal error in main(): %s", e)
-        sys.exit(1)
+    sys.excepthook = _excepthook
+    
+    app = PROGRAIN4App()
+    exit_code = app.run()
+    
+    logger.info("=" * 70)
+    logger.info("PROGRAIN 5.0 Exiting with code %s", exit_code)
+    logger.info("=" * 70)
+    
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__": 
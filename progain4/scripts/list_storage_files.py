@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 from pathlib import Path
+from urllib.parse import quote
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
@@ -18,24 +19,29 @@ print("="*80)
 print("📁 ARCHIVOS EN STORAGE - Proyecto/13/2025/12/")
 print("="*80)
 
+# Solo se usa blob.name: pedir únicamente ese campo a la API de Storage
+NAME_ONLY = "items(name),nextPageToken"
+
 # Listar archivos
-blobs = list(client.bucket.list_blobs(prefix="Proyecto/13/2025/12/"))
+blobs = list(client.bucket.list_blobs(prefix="Proyecto/13/2025/12/", fields=NAME_ONLY))
 
 if not blobs:
     print("\n⚠️ NO se encontraron archivos en Proyecto/13/2025/12/")
     print("\nProbando con Proyecto/13/2025/...")
-    blobs = list(client.bucket. list_blobs(prefix="Proyecto/13/2025/"))
+    blobs = list(client.bucket. list_blobs(prefix="Proyecto/13/2025/", fields=NAME_ONLY))
     
     if not blobs: 
         print("⚠️ NO se encontraron archivos en Proyecto/13/2025/")
         print("\nProbando con Proyecto/13/...")
-        blobs = list(client.bucket.list_blobs(prefix="Proyecto/13/"))
+        blobs = list(client.bucket.list_blobs(prefix="Proyecto/13/", fields=NAME_ONLY))
 
 if blobs:
     print(f"\n✅ Encontrados {len(blobs)} archivos:\n")
+    url_prefix = f"https://firebasestorage.googleapis.com/v0/b/{client.bucket.name}/o/"
     for i, blob in enumerate(blobs[: 20], 1):  # Primeros 20
         print(f"{i}.  {blob.name}")
-        print(f"   URL pública: https://firebasestorage.googleapis.com/v0/b/{client.bucket.name}/o/{blob.name. replace('/', '%2F')}?alt=media")
+        # quote(safe='') codifica también '/', '?', '#', espacios, etc.
+        print(f"   URL pública: {url_prefix}{quote(blob.name, safe='')}?alt=media")
         print()
 else:
     print("\n❌ NO se encontraron archivos en Proyecto/13/")
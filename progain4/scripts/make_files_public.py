@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import sys
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -19,23 +20,33 @@ print("🔓 HACIENDO PÚBLICOS LOS ARCHIVOS DE PROYECTO 13")
 print("="*80)
 
 # Listar archivos
-blobs = list(client.bucket.list_blobs(prefix="Proyecto/13/2025/12/", max_results=5))
+blobs = list(client.bucket.list_blobs(
+    prefix="Proyecto/13/2025/12/", max_results=5, fields="items(name),nextPageToken"
+))
 
 print(f"\n✅ Encontrados {len(blobs)} archivos (procesando primeros 5)")
 
-for i, blob in enumerate(blobs, 1):
-    print(f"\n{i}. {blob.name}")
-    
-    # Hacer público
+def _make_public(blob):
+    """Hace público un blob; devuelve (nombre, ok, url_o_error)."""
     try:
         blob.make_public()
-        print(f"   ✅ Ahora es público")
-        
-        # Generar URL pública
-        url = blob.public_url
-        print(f"   URL: {url}")
+        return blob.name, True, blob.public_url
     except Exception as e:
-        print(f"   ❌ Error: {e}")
+        return blob.name, False, e
+
+
+# Una petición HTTP por blob: se lanzan en paralelo y se imprimen en orden
+with ThreadPool(20) as pool:
+    results = pool.map(_make_public, blobs)
+
+for i, (name, ok, url_or_err) in enumerate(results, 1):
+    print(f"\n{i}. {name}")
+    
+    if ok:
+        print(f"   ✅ Ahora es público")
+        print(f"   URL: {url_or_err}")
+    else:
+        print(f"   ❌ Error: {url_or_err}")
 
 print("\n" + "="*80)
 print("🧪 Prueba una de las URLs arriba en el navegador")
@@ -17,6 +17,8 @@ import sys
 import os
 import argparse
 import logging
+import logging.handlers
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 
 # Agregar directorio raíz al path
@@ -28,12 +30,22 @@ from progain4.services.firebase_client import FirebaseClient
 from progain4.services. config import ConfigManager
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+# Las líneas se acumulan y se escriben a consola de 100 en 100 (escribir
+# línea a línea en la consola de Windows domina el tiempo del bucle);
+# warnings y errores fuerzan la escritura inmediata.
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+_log_buffer = logging.handlers.MemoryHandler(
+    capacity=100,
+    flushLevel=logging.WARNING,
+    target=_console_handler
 )
+logging.basicConfig(level=logging.INFO, handlers=[_log_buffer])
 logger = logging.getLogger(__name__)
 
+# Proyectos migrados en paralelo (el trabajo es I/O contra Firestore)
+MAX_WORKERS = 20
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -70,6 +82,7 @@ def main():
         logger.warning("⚠️  MODO APLICAR - SE MODIFICARÁN LOS DATOS")
         logger.warning("="*70)
         
+        _log_buffer.flush()
         respuesta = input("¿Continuar?  (escribe 'SI' para confirmar): ")
         if respuesta != 'SI':
             logger. info("Migración cancelada por el usuario")
@@ -83,6 +96,7 @@ def main():
         logger.info(f"   Usando credenciales:  {credentials_path}")
         
         # Necesitamos bucket también
+        _log_buffer.flush()
         bucket = input("Ingresa el nombre del bucket (ej: progain-25fdf. firebasestorage.app): ")
     else:
         # Cargar desde config
@@ -133,19 +147,26 @@ def main():
         "errores": 0
     }
     
-    for proyecto in proyectos:
-        proyecto_id = proyecto. get("id")
-        proyecto_nombre = proyecto.get("nombre", f"Proyecto {proyecto_id}")
-        
-        logger.info(f"\n📁 Proyecto: {proyecto_nombre} (ID: {proyecto_id})")
-        logger.info("   " + "-"*60)
-        
+    def _migrate_one(proyecto):
+        """Migra un proyecto; se ejecuta en un hilo del pool."""
         try:
-            # Ejecutar migración
             stats = firebase_client.migrate_transaction_attachments_to_paths(
-                proyecto_id=proyecto_id,
+                proyecto_id=proyecto.get("id"),
                 dry_run=dry_run
             )
+        except Exception as e:
+            stats = {"error": f"Error procesando proyecto: {e}"}
+        return proyecto, stats
+    
+    # Los resultados se reportan y acumulan en el hilo principal a medida
+    # que terminan, así que no hace falta sincronizar `totales`
+    with ThreadPool(processes=min(MAX_WORKERS, len(proyectos))) as pool:
+        for proyecto, stats in pool.imap_unordered(_migrate_one, proyectos):
+            proyecto_id = proyecto.get("id")
+            proyecto_nombre = proyecto.get("nombre", f"Proyecto {proyecto_id}")
+            
+            logger.info(f"\n📁 Proyecto: {proyecto_nombre} (ID: {proyecto_id})")
+            logger.info("   " + "-"*60)
             
             if "error" in stats:
                 logger.error(f"   ❌ Error: {stats['error']}")
@@ -154,10 +175,10 @@ def main():
             
             # Acumular estadísticas
             totales["proyectos"] += 1
-            totales["transacciones"] += stats. get("total_transactions", 0)
+            totales["transacciones"] += stats.get("total_transactions", 0)
             totales["con_adjuntos"] += stats.get("with_attachments", 0)
             totales["migradas"] += stats.get("migrated", 0)
-            totales["omitidas"] += stats. get("skipped", 0)
+            totales["omitidas"] += stats.get("skipped", 0)
             totales["errores"] += stats.get("errors", 0)
             
             # Mostrar resumen del proyecto
@@ -167,7 +188,7 @@ def main():
             logger.info(f"   Omitidas (ya migradas): {stats.get('skipped', 0)}")
             
             if stats.get("errors", 0) > 0:
-                logger. warning(f"   ⚠️  Errores:  {stats.get('errors', 0)}")
+                logger.warning(f"   ⚠️  Errores:  {stats.get('errors', 0)}")
             
             # Mostrar detalles si hay (opcional, solo primeros 10)
             detalles = stats.get("details", [])
@@ -177,10 +198,6 @@ def main():
                     logger.info(f"      {detalle}")
                 if len(detalles) > 10:
                     logger.info(f"      ...  y {len(detalles) - 10} más")
-            
-        except Exception as e: 
-            logger.error(f"   ❌ Error procesando proyecto:  {e}")
-            totales["errores"] += 1
     
     # Resumen final
     logger.info("\n" + "="*70)
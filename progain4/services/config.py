@@ -7,12 +7,32 @@ Handles application settings persistence using INI files.
 import os
 import sys
 import logging
-from typing import Optional, Tuple, Any
-from PyQt6.QtCore import QSettings
+from typing import Optional, Tuple, Any, Dict
+from PyQt6.QtCore import QSettings, QTimer, QCoreApplication
 
 logger = logging.getLogger(__name__)
 
 
+def _compute_ini_path() -> str:
+    """Ruta del archivo progain_app.ini (junto al .exe o en la raíz del proyecto)."""
+    # 1. Determinar la ruta base (donde está el . exe o el script principal)
+    if getattr(sys, 'frozen', False):
+        # Si es un ejecutable (PyInstaller)
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        # Si es script (estamos en progain4/services/config.py -> subir 2 niveles)
+        # Ruta:  . ../PROGRAIN-5.0/progain4/services/config.py
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        base_dir = os.path.dirname(os.path.dirname(current_dir))  # . ../PROGRAIN-5.0
+
+    # 2. Definir ruta del archivo . ini
+    return os.path.join(base_dir, "progain_app.ini")
+
+
+# Se calcula una sola vez: ConfigManager se instancia en varios sitios
+INI_PATH = _compute_ini_path()
+
+
 class ConfigManager:
     """
     Manages persistent application configuration. 
@@ -22,44 +42,127 @@ class ConfigManager:
     # Configuration keys
     KEY_FIREBASE_CREDENTIALS = "firebase/credentials_path"
     KEY_FIREBASE_BUCKET = "firebase/storage_bucket"
+    KEY_FIREBASE_CREDENTIALS_SIG = "firebase/credentials_validated_sig"
     KEY_THEME = "ui/theme"
     KEY_LAST_PROJECT_ID = "app/last_project_id"
     KEY_LAST_PROJECT_NAME = "app/last_project_name"
     
+    # Ventana en la que se agrupan las escrituras antes de sincronizar el INI
+    SYNC_DELAY_MS = 200
+    
     def __init__(self):
         """Initialize configuration manager using a local INI file."""
         
-        # 1. Determinar la ruta base (donde está el . exe o el script principal)
-        if getattr(sys, 'frozen', False):
-            # Si es un ejecutable (PyInstaller)
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # Si es script (estamos en progain4/services/config.py -> subir 2 niveles)
-            # Ruta:  . ../PROGRAIN-5.0/progain4/services/config.py
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            base_dir = os.path.dirname(os.path.dirname(current_dir))  # . ../PROGRAIN-5.0
-
-        # 2. Definir ruta del archivo . ini
-        ini_path = os.path.join(base_dir, "progain_app.ini")
-        
-        # 3. Forzar QSettings a usar ese archivo específico
-        self.settings = QSettings(ini_path, QSettings.Format.IniFormat)
+        # Forzar QSettings a usar ese archivo específico (ver INI_PATH)
+        self.settings = QSettings(INI_PATH, QSettings.Format.IniFormat)
         
         # Log para confirmar que está leyendo el archivo correcto
         logger.info(f"Configuration file: {self.settings.fileName()}")
         
+        # Copia en memoria de todas las claves (ver load_all); None = sin cargar
+        self._snapshot: Optional[Dict[str, Any]] = None
+        
+        # Timer de sync diferido (se crea al primer _schedule_sync)
+        self._sync_timer: Optional[QTimer] = None
+        
+        # Resultado de get_firebase_config (evita repetir el stat del archivo);
+        # se invalida al escribir o borrar las claves de Firebase
+        self._fb_config_cache: Optional[Tuple[Optional[str], Optional[str]]] = None
+    
+    # ==================== SNAPSHOT ====================
+    
+    def load_all(self) -> Dict[str, Any]:
+        """
+        Read every key of the INI file once.
+        
+        After this call the getters (get, get_theme, get_firebase_config)
+        are served from the in-memory snapshot; writes through this
+        instance keep it up to date.
+        
+        Returns:
+            Dict with all configuration keys and values
+        """
+        self._snapshot = {
+            key: self.settings.value(key) for key in self.settings.allKeys()
+        }
+        self._fb_config_cache = None
+        return dict(self._snapshot)
+    
+    def _value(self, key: str, default: Any = None) -> Any:
+        """Read a key from the snapshot if loaded, otherwise from QSettings."""
+        if self._snapshot is None:
+            return self.settings.value(key, default)
+        return self._snapshot.get(key, default)
+    
+    def _store(self, key: str, value: Any) -> None:
+        """Write a key to QSettings and keep the snapshot in sync."""
+        self.settings.setValue(key, value)
+        if self._snapshot is not None:
+            self._snapshot[key] = value
+        if key in (self.KEY_FIREBASE_CREDENTIALS, self.KEY_FIREBASE_BUCKET):
+            self._fb_config_cache = None
+    
+    def _discard(self, key: str) -> None:
+        """Remove a key from QSettings and from the snapshot."""
+        self.settings.remove(key)
+        if self._snapshot is not None:
+            self._snapshot.pop(key, None)
+        if key in (self.KEY_FIREBASE_CREDENTIALS, self.KEY_FIREBASE_BUCKET):
+            self._fb_config_cache = None
+    
+    # ==================== SYNC ====================
+    
+    def _schedule_sync(self) -> None:
+        """
+        Sync the INI file SYNC_DELAY_MS after the last write.
+        
+        A burst of writes results in a single sync. Without a running
+        QCoreApplication (scripts) the sync happens immediately.
+        """
+        if QCoreApplication.instance() is None:
+            self.settings.sync()
+            return
+        
+        if self._sync_timer is None:
+            self._sync_timer = QTimer()
+            self._sync_timer.setSingleShot(True)
+            self._sync_timer.setInterval(self.SYNC_DELAY_MS)
+            self._sync_timer.timeout.connect(self.flush)
+        self._sync_timer.start()
+    
+    def flush(self) -> None:
+        """
+        Write pending changes to disk now.
+        
+        Must be called once the event loop has finished (e.g. after
+        app.exec()), since the deferred sync timer no longer fires then.
+        QSettings also syncs when it is destroyed.
+        """
+        if self._sync_timer is not None:
+            self._sync_timer.stop()
+        self.settings.sync()
+        
     # ==================== FIREBASE CONFIG ====================
     
     def get_firebase_config(self) -> Tuple[Optional[str], Optional[str]]: 
         """
         Get the saved Firebase configuration.
         
+        The result is cached until the Firebase keys are written or removed
+        through this instance (see _store/_discard).
+        
         Returns:
             Tuple of (credentials_path, storage_bucket)
             Returns (None, None) if configuration is missing or invalid. 
         """
-        cred_path = self.settings. value(self.KEY_FIREBASE_CREDENTIALS, None)
-        bucket_name = self.settings.value(self.KEY_FIREBASE_BUCKET, None)
+        if self._fb_config_cache is None:
+            self._fb_config_cache = self._read_firebase_config()
+        return self._fb_config_cache
+    
+    def _read_firebase_config(self) -> Tuple[Optional[str], Optional[str]]:
+        """Read and validate the Firebase configuration (uncached)."""
+        cred_path = self._value(self.KEY_FIREBASE_CREDENTIALS, None)
+        bucket_name = self._value(self.KEY_FIREBASE_BUCKET, None)
         
         # Validar que el archivo de credenciales exista
         if cred_path: 
@@ -78,13 +181,14 @@ class ConfigManager:
         logger.info(f"Loaded Firebase config: {cred_path}, {bucket_name}")
         return str(cred_path), str(bucket_name)
     
-    def set_firebase_config(self, credentials_path: str, storage_bucket: str) -> bool:
+    def set_firebase_config(self, credentials_path: str, storage_bucket: str, sync: bool = False) -> bool:
         """
         Save Firebase configuration to persistent storage.
         
         Args:
             credentials_path: Path to Firebase credentials JSON file
             storage_bucket: Firebase Storage bucket name
+            sync: Write to disk immediately instead of deferring the sync
             
         Returns: 
             True if saved successfully, False otherwise
@@ -104,11 +208,13 @@ class ConfigManager:
             credentials_path = os.path.abspath(credentials_path)
                 
             # Save to settings
-            self.settings.setValue(self. KEY_FIREBASE_CREDENTIALS, credentials_path)
-            self.settings.setValue(self.KEY_FIREBASE_BUCKET, storage_bucket)
+            self._store(self.KEY_FIREBASE_CREDENTIALS, credentials_path)
+            self._store(self.KEY_FIREBASE_BUCKET, storage_bucket)
             
-            # Force sync to disk
-            self.settings.sync()
+            if sync:
+                self.flush()
+            else:
+                self._schedule_sync()
             
             logger.info(f"Firebase config saved:  {credentials_path}, {storage_bucket}")
             return True
@@ -133,9 +239,10 @@ class ConfigManager:
             
     def clear_firebase_config(self) -> None:
         """Clear Firebase configuration from persistent storage."""
-        self.settings.remove(self.KEY_FIREBASE_CREDENTIALS)
-        self.settings.remove(self.KEY_FIREBASE_BUCKET)
-        self.settings.sync()
+        self._discard(self.KEY_FIREBASE_CREDENTIALS)
+        self._discard(self.KEY_FIREBASE_BUCKET)
+        self._discard(self.KEY_FIREBASE_CREDENTIALS_SIG)
+        self._schedule_sync()
         logger.info("Cleared Firebase configuration")
         
     def has_firebase_config(self) -> bool:
@@ -154,10 +261,12 @@ class ConfigManager:
         """
         Get the saved theme name from persistent storage.
         
+        Served from the load_all() snapshot when it has been loaded.
+        
         Returns:
             Theme name (e.g., "light", "dark", "blue", "green", "midnight") or None if not set
         """
-        theme_name = self.settings.value(self.KEY_THEME, None)
+        theme_name = self._value(self.KEY_THEME, None)
         
         if theme_name: 
             logger.info(f"Loaded theme from settings: {theme_name}")
@@ -182,10 +291,9 @@ class ConfigManager:
                 return False
             
             # Save to settings
-            self.settings.setValue(self.KEY_THEME, theme_name)
+            self._store(self.KEY_THEME, theme_name)
             
-            # Force sync to disk
-            self. settings.sync()
+            self._schedule_sync()
             
             logger.info(f"Saved theme to settings: {theme_name}")
             return True
@@ -208,7 +316,7 @@ class ConfigManager:
             Configuration value or default
         """
         try:
-            value = self.settings.value(key, default)
+            value = self._value(key, default)
             return value
             
         except Exception as e: 
@@ -227,8 +335,8 @@ class ConfigManager:
             True if successful, False otherwise
         """
         try:
-            self.settings.setValue(key, value)
-            self.settings.sync()
+            self._store(key, value)
+            self._schedule_sync()
             
             logger.debug(f"Saved config:  {key} = {value}")
             return True
@@ -237,6 +345,28 @@ class ConfigManager:
             logger. error(f"Error writing config key '{key}': {e}")
             return False
     
+    def set_many(self, values: Dict[str, Any]) -> bool:
+        """
+        Set several configuration values (they share one deferred sync).
+        
+        Args:
+            values: Mapping of configuration keys to values
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            for key, value in values.items():
+                self._store(key, value)
+            self._schedule_sync()
+            
+            logger.debug(f"Saved config: {', '.join(values)}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error writing config keys {list(values)}: {e}")
+            return False
+    
     def delete(self, key: str) -> bool:
         """
         Delete a configuration value. 
@@ -248,8 +378,8 @@ class ConfigManager:
             True if successful, False otherwise
         """
         try:
-            self.settings. remove(key)
-            self.settings.sync()
+            self._discard(key)
+            self._schedule_sync()
             
             logger.debug(f"Deleted config key: {key}")
             return True
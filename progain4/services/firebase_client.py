@@ -24,6 +24,8 @@ IMPORTANTE:
 """
 from typing import Union
 import os
+import re
+import time
 import logging
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date
@@ -48,6 +50,12 @@ TIPO_INGRESO = "ingreso"
 TIPO_GASTO = "gasto"
 VALID_TRANSACTION_TYPES = [TIPO_INGRESO, TIPO_GASTO]
 
+# Segundos que se reutiliza el mapa id -> nombre de cuentas de un proyecto
+CUENTAS_MAP_TTL = 60.0
+
+# "Cuenta <id>" en descripciones de transferencias antiguas
+_CUENTA_TOKEN_RE = re.compile(r'Cuenta (\d+)')
+
 
 class FirebaseClient:
     """
@@ -68,12 +76,25 @@ class FirebaseClient:
         self.db: Optional["firestore.Client"] = None
         self.bucket: Optional["storage.Bucket"] = None
         self._initialized = False
+        # proyecto_id -> (deadline monotónico, {cuenta_id: nombre}); ver _get_cuentas_map
+        self._cuentas_map_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
 
     # ==================== INITIALIZATION ====================
 
-    def initialize(self, credentials_path: str, storage_bucket: str) -> bool:
+    def initialize(
+        self,
+        credentials_path: str,
+        storage_bucket: str,
+        credentials_info: Optional[Dict[str, Any]] = None,
+    ) -> bool:
             """
             Initialize Firebase with credentials.
+
+            Args:
+                credentials_path: Path to the service account JSON file
+                storage_bucket: Firebase Storage bucket name
+                credentials_info: Already-parsed contents of credentials_path
+                    (optional); avoids reading and parsing the file again
             """
             if not FIREBASE_AVAILABLE:
                 logger.error("Firebase Admin SDK not available")
@@ -92,20 +113,26 @@ class FirebaseClient:
                     logger.info("Firebase already initialized")
                     return True
 
-                # Verify credentials file exists
-                if not os.path.exists(credentials_path):
-                    logger.error("Credentials file not found: %s", credentials_path)
-                    return False
-
-                # Initialize Firebase Admin SDK
-                cred = credentials.Certificate(credentials_path)
-
-                # Initialize app if not already done
+                # Reutilizar la app por defecto si ya existe en este proceso
+                # (otra instancia de FirebaseClient o un script encadenado):
+                # así no se vuelve a leer ni parsear el certificado.
                 try:
-                    firebase_admin.initialize_app(cred, {"storageBucket": storage_bucket})
-                except ValueError:
-                    # App already initialized
+                    firebase_admin.get_app()
                     logger.info("Firebase app already initialized")
+                except ValueError:
+                    # Verify credentials file exists (not needed if already parsed)
+                    if credentials_info is None and not os.path.exists(credentials_path):
+                        logger.error("Credentials file not found: %s", credentials_path)
+                        return False
+
+                    # Initialize Firebase Admin SDK
+                    # (Con una cuenta de servicio esto es local: no se descargan
+                    # claves públicas/JWKS. El token OAuth se obtiene en la primera
+                    # petición y no se persiste en disco a propósito.)
+                    cred = credentials.Certificate(
+                        credentials_info if credentials_info is not None else credentials_path
+                    )
+                    firebase_admin.initialize_app(cred, {"storageBucket": storage_bucket})
 
                 # Get Firestore client
                 self.db = firestore.client()
@@ -134,9 +161,10 @@ class FirebaseClient:
         Get all projects from Firestore.
 
         Returns:
-            List of project dictionaries with keys at least:
+            List of plain project dictionaries (never DocumentSnapshots)
+            with keys always present:
             - id      (string)
-            - nombre
+            - nombre  (falls back to "Proyecto <id>")
             - moneda
             - cuenta_principal
         """
@@ -251,23 +279,26 @@ class FirebaseClient:
                     else:
                         ids_habilitados.add(doc.id)
 
-                # 2. Obtener el catálogo maestro de cuentas
-                # Nota: Si get_cuentas() no existe internamente, hacemos la query directa aquí:
-                todas_cuentas_ref = self.db.collection('cuentas')
-                todas_cuentas_docs = todas_cuentas_ref.stream()
+                # 2. Leer solo las cuentas habilitadas del catálogo maestro:
+                # el cruce es por ID de documento, así que basta un get_all
+                # (una sola RPC) en lugar de recorrer toda la colección.
+                # IDs vacíos o con '/' no pueden ser IDs de documento.
+                cuentas_ref = self.db.collection('cuentas')
+                refs = [
+                    cuentas_ref.document(c_id)
+                    for c_id in ids_habilitados
+                    if c_id and '/' not in c_id
+                ]
                 
                 cuentas_filtradas = []
                 
-                # 3. Cruzar datos: Solo agregamos las que están en ids_habilitados
-                for doc in todas_cuentas_docs:
+                # 3. Las asignaciones que apuntan a cuentas borradas no existen
+                for doc in (self.db.get_all(refs) if refs else ()):
+                    if not doc.exists:
+                        continue
                     data = doc.to_dict()
                     data['id'] = doc.id
-                    
-                    # Normalizar ID a string para comparar
-                    c_id_str = str(data.get('id', ''))
-                    
-                    if c_id_str in ids_habilitados:
-                        cuentas_filtradas.append(data)
+                    cuentas_filtradas.append(data)
 
                 # Ordenar alfabéticamente para que se vean bien en el Sidebar
                 cuentas_filtradas.sort(key=lambda x: x.get('nombre', '').lower())
@@ -339,6 +370,7 @@ class FirebaseClient:
                 doc_ref.id,
                 proyecto_id,
             )
+            self._invalidate_cuentas_map()
             return doc_ref.id
 
         except Exception as e:
@@ -380,6 +412,7 @@ class FirebaseClient:
             cuenta_ref.update(updates)
 
             logger.info("Updated account %s (project hint: %s)", cuenta_id, proyecto_id)
+            self._invalidate_cuentas_map()
             return True
 
         except Exception as e:
@@ -438,6 +471,7 @@ class FirebaseClient:
                     proyecto_id,
                 )
 
+            self._invalidate_cuentas_map()
             return True
 
         except Exception as e:
@@ -551,8 +585,67 @@ class FirebaseClient:
             logger.error(f"Error recuperando subcategorías globales: {e}")
             return []
 
+    def prefetch_catalogs(
+        self, names: Tuple[str, ...] = ("cuentas", "categorias", "subcategorias")
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Lee varios catálogos globales en paralelo (el cliente de Firestore es
+        thread-safe), así la espera total es la de la consulta más lenta y no
+        la suma de todas.
+
+        Args:
+            names: Catálogos a leer: "cuentas", "categorias" y/o "subcategorias"
+
+        Returns:
+            Dict {nombre: lista de documentos}, igual que get_cuentas/
+            get_categorias/get_subcategorias
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        fetchers = {
+            "cuentas": self.get_cuentas,
+            "categorias": self.get_categorias,
+            "subcategorias": self.get_subcategorias,
+        }
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(names)) as executor:
+            results = list(executor.map(lambda name: fetchers[name](), names))
+        return dict(zip(names, results))
+
     # ==================== TRANSACTIONS ====================
 
+    def _get_cuentas_map(self, proyecto_id: str) -> Dict[str, str]:
+        """
+        Mapa {cuenta_id: nombre} de las cuentas del proyecto.
+
+        Se reutiliza durante CUENTAS_MAP_TTL segundos para no repetir las dos
+        consultas de get_cuentas_by_proyecto en cada recarga de transacciones.
+        Los métodos que modifican cuentas o asignaciones lo invalidan.
+        """
+        key = str(proyecto_id)
+        cached = self._cuentas_map_cache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        cuentas_proyecto = self.get_cuentas_by_proyecto(proyecto_id) or []
+        cuentas_map = {
+            str(c.get('id')): c.get('nombre', f"Cuenta {c.get('id')}")
+            for c in cuentas_proyecto
+            if 'id' in c
+        }
+        # Un mapa vacío puede venir de un error de red: no se cachea
+        if cuentas_map:
+            self._cuentas_map_cache[key] = (time.monotonic() + CUENTAS_MAP_TTL, cuentas_map)
+        return cuentas_map
+
+    def _invalidate_cuentas_map(self, proyecto_id: Optional[str] = None) -> None:
+        """Descarta el mapa de cuentas de un proyecto (o de todos si es None)."""
+        if proyecto_id is None:
+            self._cuentas_map_cache.clear()
+        else:
+            self._cuentas_map_cache.pop(str(proyecto_id), None)
+
     def get_transacciones_by_proyecto(
         self,
         proyecto_id: str,
@@ -577,12 +670,7 @@ class FirebaseClient:
         try:
             # ✅ PASO 1: Cargar mapa de cuentas ANTES de procesar
             try:
-                cuentas_proyecto = self.get_cuentas_by_proyecto(proyecto_id) or []
-                cuentas_map = {
-                    str(c. get('id')): c.get('nombre', f"Cuenta {c.get('id')}")
-                    for c in cuentas_proyecto
-                    if 'id' in c
-                }
+                cuentas_map = self._get_cuentas_map(proyecto_id)
                 logger.debug(f"Loaded {len(cuentas_map)} accounts for name resolution")
             except Exception as e: 
                 logger.warning(f"Could not load accounts map: {e}")
@@ -607,6 +695,10 @@ class FirebaseClient:
                 # No hay filtro de cuenta, obtener todas
                 docs = trans_ref.stream()
             
+            def replace_cuenta(match):
+                """Reemplaza "Cuenta <id>" por el nombre real de la cuenta"""
+                return cuentas_map.get(match.group(1), match.group(0))
+            
             # Procesar transacciones
             transacciones = []
             excluded_count = 0
@@ -630,20 +722,12 @@ class FirebaseClient:
                 if data.get('es_transferencia') or 'Transferencia' in data. get('descripcion', ''):
                     descripcion_original = data.get('descripcion', '')
                     
-                    # Buscar y reemplazar patrones "Cuenta X" con nombres reales
-                    import re
-                    
-                    # Patrón para detectar "Cuenta <número>"
-                    pattern = r'Cuenta (\d+)'
-                    
-                    def replace_cuenta(match):
-                        """Función helper para reemplazar cada coincidencia"""
-                        cuenta_id_str = match.group(1)
-                        cuenta_nombre = cuentas_map.get(cuenta_id_str, f"Cuenta {cuenta_id_str}")
-                        return cuenta_nombre
-                    
                     # Reemplazar todas las ocurrencias de "Cuenta X" con nombres
-                    descripcion_nueva = re.sub(pattern, replace_cuenta, descripcion_original)
+                    # (sin "Cuenta " no hay nada que buscar)
+                    if 'Cuenta ' in descripcion_original:
+                        descripcion_nueva = _CUENTA_TOKEN_RE.sub(replace_cuenta, descripcion_original)
+                    else:
+                        descripcion_nueva = descripcion_original
                     
                     # Actualizar solo si cambió
                     if descripcion_nueva != descripcion_original:
@@ -807,8 +891,7 @@ class FirebaseClient:
         try:
             # ✅ PASO 1: Obtener nombres de las cuentas
             try:
-                cuentas = self.get_cuentas_by_proyecto(proyecto_id) or []
-                cuentas_map = {str(c.get('id')): c.get('nombre', f"Cuenta {c.get('id')}") for c in cuentas}
+                cuentas_map = self._get_cuentas_map(proyecto_id)
                 
                 cuenta_origen_nombre = cuentas_map.get(str(cuenta_origen_id), f"Cuenta {cuenta_origen_id}")
                 cuenta_destino_nombre = cuentas_map.get(str(cuenta_destino_id), f"Cuenta {cuenta_destino_id}")
@@ -1534,6 +1617,7 @@ class FirebaseClient:
                 }
             )
             logger.info("Created master account '%s' (ID: %s)", nombre, doc_ref.id)
+            self._invalidate_cuentas_map()
             return doc_ref.id
         except Exception as e:
             logger.error("Error creating master account '%s': %s", nombre, e)
@@ -1556,6 +1640,7 @@ class FirebaseClient:
                 }
             )
             logger.info("Updated master account %s to '%s'", cuenta_id, nuevo_nombre)
+            self._invalidate_cuentas_map()
             return True
         except Exception as e:
             logger.error(
@@ -1579,6 +1664,7 @@ class FirebaseClient:
             doc_ref = self.db.collection("cuentas").document(cuenta_id)
             doc_ref.delete()
             logger.info("Deleted master account %s", cuenta_id)
+            self._invalidate_cuentas_map()
             return True
         except Exception as e:
             logger.error("Error deleting master account %s: %s", cuenta_id, e)
@@ -1773,6 +1859,7 @@ class FirebaseClient:
             logger. info(
                 "Saved %d project accounts for project %s", len(cuentas), proyecto_id
             )
+            self._invalidate_cuentas_map(proyecto_id)
             return True
 
         except Exception as e: 
@@ -1829,6 +1916,7 @@ class FirebaseClient:
                 proyecto_id,
                 id_cuenta_principal,
             )
+            self._invalidate_cuentas_map(proyecto_id)
             return True
         except Exception as e:
             logger.error(
@@ -4944,109 +5032,151 @@ class FirebaseClient:
                 "details": []
             }
             
-            for doc in docs:
-                data = doc.to_dict() or {}
-                trans_id = doc.id
+            # Las actualizaciones van por un BulkWriter: el SDK agrupa,
+            # paraleliza, limita el ritmo y reintenta los fallos transitorios
+            # (en lugar de un update() por documento).
+            # Los callbacks corren en hilos del BulkWriter: solo hacen append
+            # a sus listas y `stats` se actualiza tras close().
+            now = datetime.now()
+            written = []  # ids de transacciones actualizadas
+            failed = []   # (id, mensaje) de las que agotaron los reintentos
+            bulk_writer = None if dry_run else self.db.bulk_writer()
+            
+            if bulk_writer is not None:
+                def _on_write_result(reference, result, writer):
+                    written.append(reference.id)
                 
-                # Si ya tiene adjuntos_paths, verificar si está corrupto
-                existing_paths = data.get("adjuntos_paths", [])
-                if existing_paths:
-                    # Verificar si tiene parámetros de query (corrupto)
-                    needs_fix = any('?' in p or 'Expires=' in p for p in existing_paths if isinstance(p, str))
-                    if not needs_fix:
-                        stats["skipped"] += 1
-                        continue
-                    else:
-                        logger.warning(f"Found corrupted adjuntos_paths in {trans_id}, will re-migrate")
+                from google.rpc import code_pb2
                 
-                # Si no tiene adjuntos legacy, skip
-                adjuntos_legacy = data.get("adjuntos", [])
-                if not adjuntos_legacy:
-                    continue
+                # Solo se reintentan los errores transitorios; INVALID_ARGUMENT,
+                # PERMISSION_DENIED, NOT_FOUND, etc. fallan a la primera
+                retryable_codes = {
+                    code_pb2.ABORTED,
+                    code_pb2.UNAVAILABLE,
+                    code_pb2.RESOURCE_EXHAUSTED,
+                    code_pb2.DEADLINE_EXCEEDED,
+                }
                 
-                stats["with_attachments"] += 1
+                def _on_write_error(failure, writer) -> bool:
+                    if failure.code in retryable_codes and failure.attempts < 5:
+                        return True  # reintentar
+                    failed.append((failure.operation.reference.id, failure.message))
+                    return False
                 
-                # Extraer paths de las URLs
-                paths = []
-                for url in adjuntos_legacy: 
-                    if not url or not isinstance(url, str):
+                bulk_writer.on_write_result(_on_write_result)
+                bulk_writer.on_write_error(_on_write_error)
+            
+            try:
+                for doc in docs:
+                    data = doc.to_dict() or {}
+                    trans_id = doc.id
+                
+                    # Si ya tiene adjuntos_paths, verificar si está corrupto
+                    existing_paths = data.get("adjuntos_paths", [])
+                    if existing_paths:
+                        # Verificar si tiene parámetros de query (corrupto)
+                        needs_fix = any('?' in p or 'Expires=' in p for p in existing_paths if isinstance(p, str))
+                        if not needs_fix:
+                            stats["skipped"] += 1
+                            continue
+                        else:
+                            logger.warning(f"Found corrupted adjuntos_paths in {trans_id}, will re-migrate")
+                
+                    # Si no tiene adjuntos legacy, skip
+                    adjuntos_legacy = data.get("adjuntos", [])
+                    if not adjuntos_legacy:
                         continue
+                
+                    stats["with_attachments"] += 1
+                
+                    # Extraer paths de las URLs
+                    paths = []
+                    for url in adjuntos_legacy: 
+                        if not url or not isinstance(url, str):
+                            continue
                     
-                    try:
-                        path = None
-                        
-                        # ✅ FORMATO 1: gs://bucket/Proyecto/... 
-                        if url.startswith('gs://'):
-                            # Formato: gs://progain-25fdf.firebasestorage.app/Proyecto/10/2025/12/file.jpg
-                            parts = url. split('. app/')
-                            if len(parts) > 1:
-                                path = parts[1]
-                                # Remover query params si existen
-                                path = path.split('?')[0]
-                                path = urllib.parse.unquote(path)
-                            else:
-                                # Formato alternativo:  gs://bucket-name/path
-                                parts = url.split('/', 3)
-                                if len(parts) > 3:
-                                    path = parts[3]
-                                    path = path.split('?')[0]
-                                    path = urllib.parse. unquote(path)
+                        try:
+                            path = None
                         
-                        # ✅ FORMATO 2: https://storage.googleapis.com/bucket/Proyecto/...? Expires=...
-                        elif url.startswith('https://storage.googleapis.com/'):
-                            # Extraer después de . app/ o bucket/
-                            if 'firebasestorage.app/' in url:
-                                parts = url.split('firebasestorage.app/')
+                            # ✅ FORMATO 1: gs://bucket/Proyecto/... 
+                            if url.startswith('gs://'):
+                                # Formato: gs://progain-25fdf.firebasestorage.app/Proyecto/10/2025/12/file.jpg
+                                parts = url. split('. app/')
                                 if len(parts) > 1:
-                                    path_with_query = parts[1]
-                                    # ✅ CRÍTICO: Remover parámetros de query
-                                    path = path_with_query.split('?')[0]
+                                    path = parts[1]
+                                    # Remover query params si existen
+                                    path = path.split('?')[0]
                                     path = urllib.parse.unquote(path)
-                            else: 
-                                # https://storage.googleapis.com/bucket-name/Proyecto/... 
-                                parts = url.split('googleapis.com/', 1)
-                                if len(parts) > 1:
-                                    full_path = parts[1]
-                                    # Remover bucket y query params
-                                    path_parts = full_path.split('/', 1)
-                                    if len(path_parts) > 1:
-                                        path_with_query = path_parts[1]
+                                else:
+                                    # Formato alternativo:  gs://bucket-name/path
+                                    parts = url.split('/', 3)
+                                    if len(parts) > 3:
+                                        path = parts[3]
+                                        path = path.split('?')[0]
+                                        path = urllib.parse. unquote(path)
+                        
+                            # ✅ FORMATO 2: https://storage.googleapis.com/bucket/Proyecto/...? Expires=...
+                            elif url.startswith('https://storage.googleapis.com/'):
+                                # Extraer después de . app/ o bucket/
+                                if 'firebasestorage.app/' in url:
+                                    parts = url.split('firebasestorage.app/')
+                                    if len(parts) > 1:
+                                        path_with_query = parts[1]
                                         # ✅ CRÍTICO: Remover parámetros de query
                                         path = path_with_query.split('?')[0]
                                         path = urllib.parse.unquote(path)
+                                else: 
+                                    # https://storage.googleapis.com/bucket-name/Proyecto/... 
+                                    parts = url.split('googleapis.com/', 1)
+                                    if len(parts) > 1:
+                                        full_path = parts[1]
+                                        # Remover bucket y query params
+                                        path_parts = full_path.split('/', 1)
+                                        if len(path_parts) > 1:
+                                            path_with_query = path_parts[1]
+                                            # ✅ CRÍTICO: Remover parámetros de query
+                                            path = path_with_query.split('?')[0]
+                                            path = urllib.parse.unquote(path)
                         
-                        # ✅ VALIDAR:  Debe empezar con "Proyecto/" y NO tener "?"
-                        if path and path. startswith('Proyecto/') and '?' not in path:
-                            paths.append(path)
-                            stats["details"].append(f"✓ {trans_id}:  Extracted clean path {path}")
-                        else: 
-                            stats["details"].append(f"⚠ {trans_id}:  Invalid path extracted:  '{path}' from {url[: 80]}...")
+                            # ✅ VALIDAR:  Debe empezar con "Proyecto/" y NO tener "?"
+                            if path and path. startswith('Proyecto/') and '?' not in path:
+                                paths.append(path)
+                                stats["details"].append(f"✓ {trans_id}:  Extracted clean path {path}")
+                            else: 
+                                stats["details"].append(f"⚠ {trans_id}:  Invalid path extracted:  '{path}' from {url[: 80]}...")
                             
-                    except Exception as e:
-                        stats["errors"] += 1
-                        stats["details"].append(f"✗ {trans_id}: Error parsing URL - {e}")
-                        logger.error(f"Error parsing URL for {trans_id}: {e}")
+                        except Exception as e:
+                            stats["errors"] += 1
+                            stats["details"].append(f"✗ {trans_id}: Error parsing URL - {e}")
+                            logger.error(f"Error parsing URL for {trans_id}: {e}")
                 
-                # Actualizar documento
-                if paths:
-                    if not dry_run:
-                        try:
-                            doc.reference.update({
+                    # Actualizar documento
+                    if paths:
+                        if not dry_run:
+                            bulk_writer.update(doc.reference, {
                                 "adjuntos_paths": paths,
-                                "updatedAt": datetime.now()
+                                "updatedAt": now
                             })
+                        else:
                             stats["migrated"] += 1
-                            logger.info(f"✓ Migrated {len(paths)} attachments for transaction {trans_id}")
-                        except Exception as e:
-                            stats["errors"] += 1
-                            stats["details"].append(f"✗ {trans_id}: Error updating - {e}")
+                            logger.info(f"[DRY RUN] Would migrate {len(paths)} attachments for transaction {trans_id}")
                     else:
-                        stats["migrated"] += 1
-                        logger.info(f"[DRY RUN] Would migrate {len(paths)} attachments for transaction {trans_id}")
-                else:
-                    # No se pudo extraer ningún path
-                    if adjuntos_legacy:
-                        stats["details"].append(f"⚠ {trans_id}: No valid paths extracted from {len(adjuntos_legacy)} URLs")
+                        # No se pudo extraer ningún path
+                        if adjuntos_legacy:
+                            stats["details"].append(f"⚠ {trans_id}: No valid paths extracted from {len(adjuntos_legacy)} URLs")
+            finally:
+                if bulk_writer is not None:
+                    # Espera a que terminen todas las escrituras (y sus
+                    # callbacks), también si el bucle termina con una excepción
+                    bulk_writer.close()
+            
+            if bulk_writer is not None:
+                for written_id in written:
+                    logger.info(f"✓ Migrated attachments for transaction {written_id}")
+                stats["migrated"] += len(written)
+                stats["errors"] += len(failed)
+                for failed_id, message in failed:
+                    stats["details"].append(f"✗ {failed_id}: Error updating - {message}")
             
             logger.info(f"{'[DRY RUN] ' if dry_run else ''}Migration completed:")
             logger.info(f"  Total transactions: {stats['total_transactions']}")
@@ -363,7 +363,7 @@ class FirebaseConfigDialog(QDialog):
         # Guardar en ConfigManager
         if self.config_manager:
             try:
-                success = self.config_manager.set_firebase_config(cred_path, bucket)
+                success = self.config_manager.set_firebase_config(cred_path, bucket, sync=True)
                 if success:
                     logger.info(f"Firebase config saved:  {cred_path}, {bucket}")
                     
@@ -11,7 +11,6 @@ import sys
 import os
 
 from progain4.services.firebase_client import FirebaseClient
-from progain4.services. config import ConfigManager
 
 # Widgets y Diálogos
 from progain4.ui.widgets.transactions_widget import TransactionsWidget
@@ -428,20 +427,8 @@ class MainWindow4(QMainWindow):
         
         try:
             logger.info("Loading projects for combo selector")
-            proyectos_raw = self.firebase_client.get_proyectos()
-            
-            # Normalize results
-            proyectos = []
-            for p in proyectos_raw: 
-                if hasattr(p, 'to_dict'):
-                    data = p.to_dict() or {}
-                    proj_id = p.id
-                    proj_nombre = data.get('nombre', f'Proyecto {proj_id}')
-                else:
-                    proj_id = p.get('id', '')
-                    proj_nombre = p. get('nombre', f'Proyecto {proj_id}')
-                
-                proyectos.append({'id': str(proj_id), 'nombre': proj_nombre})
+            # get_proyectos devuelve dicts planos con 'id' (str) y 'nombre'
+            proyectos = self.firebase_client.get_proyectos()
             
             # ✅ CRÍTICO: Desconectar señal ANTES de poblar para evitar cambios no deseados
             self.project_combo.currentIndexChanged.disconnect(self._on_project_selected)
@@ -773,7 +760,9 @@ class MainWindow4(QMainWindow):
         """Abrir diálogo de configuración de Firebase."""
         from progain4.ui.dialogs.firebase_config_dialog import show_firebase_config_dialog
         
-        config = ConfigManager()
+        # La misma instancia que la app: una ConfigManager nueva tendría su
+        # propia instantánea y su propio sync diferido
+        config = self.config_manager
         
         result = show_firebase_config_dialog(parent=self, config_manager=config)
         
@@ -795,6 +784,10 @@ class MainWindow4(QMainWindow):
                 # Cerrar ventana actual
                 self.close()
                 
+                # os.execl reemplaza el proceso sin ejecutar destructores:
+                # escribir ya cualquier cambio pendiente del INI
+                config.flush()
+                
                 # Reiniciar el proceso
                 if getattr(sys, 'frozen', False):
                     # Si es ejecutable
@@ -1169,8 +1162,7 @@ class MainWindow4(QMainWindow):
             if app:
                 theme_manager. apply_theme(app, theme_name)
                 
-                config = ConfigManager()
-                if config.set_theme(theme_name):
+                if self.config_manager.set_theme(theme_name):
                     logger.info(f"Theme '{theme_name}' saved")
                 else:
                     logger.warning(f"Failed to save theme '{theme_name}'")
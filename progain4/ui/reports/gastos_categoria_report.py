@@ -175,7 +175,11 @@ class GastosPorCategoriaWindowFirebase(QMainWindow):
             # Caso 3: Es string (YYYY-MM-DD...)
             if isinstance(date_val, str):
                 # Tomamos solo los primeros 10 chars por si viene con hora
-                return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
+                try:
+                    return date.fromisoformat(date_val[:10])
+                except ValueError:
+                    # Fechas antiguas sin ceros a la izquierda (2024-1-5)
+                    return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
                 
         except Exception:
             return None
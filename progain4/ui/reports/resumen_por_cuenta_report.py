@@ -170,7 +170,11 @@ class ResumenPorCuentaReport(QDialog):
             if type(date_val) is date: return date_val
             if isinstance(date_val, datetime): return date_val.date()
             if isinstance(date_val, str):
-                return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
+                try:
+                    return date.fromisoformat(date_val[:10])
+                except ValueError:
+                    # Fechas antiguas sin ceros a la izquierda (2024-1-5)
+                    return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
         except Exception:
             return None
         return None
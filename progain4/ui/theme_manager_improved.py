@@ -40,11 +40,21 @@ class ThemeManager(QObject):
         """
         Genera el QSS para el tema seleccionado y lo aplica a la QApplication.
         """
+        theme_name, qss = self.build_stylesheet(theme_name)
+        self.apply_stylesheet(app, theme_name, qss)
+
+    def build_stylesheet(self, theme_name: str):
+        """
+        Genera el QSS de un tema sin tocar objetos de Qt (se puede llamar
+        desde un hilo secundario).
+
+        Returns:
+            Tupla (nombre_de_tema_resuelto, qss)
+        """
         if theme_name not in THEMES:
             print(f"Advertencia: Tema '{theme_name}' no encontrado. Usando 'light'.")
             theme_name = "light"
         
-        self.current_theme = theme_name
         palette = THEMES[theme_name]
         
         # Construcción del QSS Maestro
@@ -222,7 +232,13 @@ class ThemeManager(QObject):
             font-weight: bold;
         }}
         """
-        
+        return theme_name, qss
+
+    def apply_stylesheet(self, app: QApplication, theme_name: str, qss: str):
+        """
+        Aplica un QSS ya generado por build_stylesheet (solo hilo de la GUI).
+        """
+        self.current_theme = theme_name
         app.setStyleSheet(qss)
         self.theme_changed.emit(theme_name)
         print(f"Tema '{theme_name}' aplicado correctamente.")
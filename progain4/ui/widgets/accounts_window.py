@@ -323,15 +323,11 @@ class AccountsWindow(QMainWindow):
     def _load_categorias_globales(self):
         """Carga todas las categorías y subcategorías del sistema para mapeo global."""
         try:
-            # Categorías
-            if hasattr(self.firebase_client, 'get_categorias'):
-                cats = self.firebase_client.get_categorias()
-                self.categorias_map = {str(c['id']): c.get('nombre', '') for c in cats}
-            
-            # Subcategorías
-            if hasattr(self.firebase_client, 'get_subcategorias'):
-                subcats = self.firebase_client.get_subcategorias()
-                self.subcategorias_map = {str(s['id']): s.get('nombre', '') for s in subcats}
+            # Categorías y subcategorías se leen en paralelo
+            if hasattr(self.firebase_client, 'prefetch_catalogs'):
+                catalogos = self.firebase_client.prefetch_catalogs(("categorias", "subcategorias"))
+                self.categorias_map = {str(c['id']): c.get('nombre', '') for c in catalogos["categorias"]}
+                self.subcategorias_map = {str(s['id']): s.get('nombre', '') for s in catalogos["subcategorias"]}
                 
             logger.info(f"Mapas globales cargados: {len(self.categorias_map)} cats, {len(self.subcategorias_map)} subcats")
         except Exception as e:
@@ -417,6 +413,9 @@ class AccountsWindow(QMainWindow):
         if isinstance(date_val, datetime): return date_val.date()
         if isinstance(date_val, date): return date_val
         if isinstance(date_val, str):
+            try: return date.fromisoformat(date_val[:10])
+            except ValueError: pass
+            # Fechas antiguas sin ceros a la izquierda (2024-1-5)
             try: return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
             except ValueError: return None
         return None
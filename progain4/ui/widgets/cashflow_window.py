@@ -236,7 +236,11 @@ class CashflowWindow(QMainWindow):
             if isinstance(date_val, date): 
                 return date_val
             if isinstance(date_val, str):
-                return datetime.strptime(date_val[: 10], "%Y-%m-%d").date()
+                try:
+                    return date.fromisoformat(date_val[:10])
+                except ValueError:
+                    # Fechas antiguas sin ceros a la izquierda (2024-1-5)
+                    return datetime.strptime(date_val[:10], "%Y-%m-%d").date()
         except ValueError:  
             return None
         return None
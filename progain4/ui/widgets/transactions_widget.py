@@ -207,7 +207,11 @@ class TransactionsWidget(QWidget):
             try:
                 # Intenta parsear string YYYY-MM-DD
                 # Tomar solo los primeros 10 chars para evitar problemas con horas
-                dt = datetime.strptime(date_val[:10], "%Y-%m-%d")
+                try:
+                    dt = datetime.fromisoformat(date_val[:10])
+                except ValueError:
+                    # Fechas antiguas sin ceros a la izquierda (2024-1-5)
+                    dt = datetime.strptime(date_val[:10], "%Y-%m-%d")
                 # Asegurar que es naive
                 return dt.replace(tzinfo=None)
             except (ValueError, IndexError):
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite hash cache used by progain4/del_duplicate.py.
+
+CleanupWorker.run() is called directly (without starting the thread) against
+an in-memory fake of the project's transactions collection.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# del_duplicate imports PyQt6 and firebase_admin at module level
+pytest.importorskip("PyQt6.QtWidgets")
+pytest.importorskip("firebase_admin")
+
+from progain4 import del_duplicate
+from progain4.del_duplicate import CleanupWorker, HASH_CACHE_VERSION
+
+PID = "p1"
+
+
+class FakeDoc:
+    def __init__(self, doc_id, data, update_time):
+        self.id = doc_id
+        self._data = data
+        self.update_time = update_time
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeRef:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self._doc_id = doc_id
+
+    def delete(self):
+        self._collection.docs = [
+            d for d in self._collection.docs if d.id != self._doc_id
+        ]
+
+
+class FakeCollection:
+    """Minimal stand-in for proyectos/<pid>/transacciones."""
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    # db.collection('proyectos').document(pid).collection('transacciones')
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        if doc_id == PID:
+            return self
+        return FakeRef(self, doc_id)
+
+    def select(self, fields):
+        return self
+
+    def stream(self):
+        return iter(list(self.docs))
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "data" / "dedup_cache.db"
+    monkeypatch.setattr(del_duplicate, "HASH_CACHE_PATH", path)
+    return path
+
+
+def _cache_rows(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return {
+            did: (upd, key)
+            for did, upd, key in conn.execute(
+                "SELECT did, upd, key FROM h WHERE pid = ?", (PID,)
+            )
+        }
+    finally:
+        conn.close()
+
+
+def _run(db, dry_run=True):
+    """Run the worker in this thread; return the doc ids whose key was computed."""
+    worker = CleanupWorker(db, PID, dry_run=dry_run)
+    computed = []
+    original = worker._compute_missing_keys
+
+    def spy(rows):
+        computed.extend(did for did, _ in rows)
+        return original(rows)
+
+    worker._compute_missing_keys = spy
+    results = []
+    worker.finished.connect(lambda found, deleted: results.append((found, deleted)))
+    worker.run()
+    return computed, results
+
+
+def _doc(doc_id, monto, upd="t1"):
+    data = {"fecha": "2024-01-05", "descripcion": "Cemento", "monto": monto}
+    return FakeDoc(doc_id, data, upd)
+
+
+def test_cache_created_in_missing_directory(cache_path):
+    assert not cache_path.parent.exists()
+    _run(FakeCollection([_doc("a", 100)]))
+    assert set(_cache_rows(cache_path)) == {"a"}
+
+
+def test_version_mismatch_resets_table(cache_path):
+    cache_path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(str(cache_path))
+    conn.execute(
+        "CREATE TABLE h(pid TEXT, did TEXT, upd TEXT, key BLOB, "
+        "PRIMARY KEY(pid, did))"
+    )
+    conn.execute("INSERT INTO h VALUES (?, ?, ?, ?)", (PID, "old", "t0", b"x"))
+    conn.execute(f"PRAGMA user_version = {HASH_CACHE_VERSION - 1}")
+    conn.commit()
+    conn.close()
+
+    conn = CleanupWorker(None, PID)._open_hash_cache()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == HASH_CACHE_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM h").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_row_reused_until_update_time_changes(cache_path):
+    db = FakeCollection([_doc("a", 100), _doc("b", 250)])
+
+    computed, _ = _run(db)
+    assert sorted(computed) == ["a", "b"]
+
+    # Same update_time: keys come from the cache
+    computed, _ = _run(db)
+    assert computed == []
+
+    # Modified document: only its key is recomputed
+    old_key = _cache_rows(cache_path)["b"][1]
+    db.docs[1] = _doc("b", 300, upd="t2")
+    computed, _ = _run(db)
+    assert computed == ["b"]
+    upd, key = _cache_rows(cache_path)["b"]
+    assert upd == "t2"
+    assert key != old_key
+
+
+def test_prune_removes_deleted_duplicates(cache_path):
+    db = FakeCollection([_doc("a", 100), _doc("b", 100.0), _doc("c", "100.00"),
+                         _doc("d", 5)])
+
+    # Dry run: nothing is deleted and the cache keeps every row
+    _, results = _run(db, dry_run=True)
+    assert results == [(1, 0)]
+    assert set(_cache_rows(cache_path)) == {"a", "b", "c", "d"}
+
+    _, results = _run(db, dry_run=False)
+    assert results == [(1, 2)]
+    assert [d.id for d in db.docs] == ["a", "d"]
+    assert set(_cache_rows(cache_path)) == {"a", "d"}
+
+
+def test_prune_only_touches_current_project(cache_path):
+    worker = CleanupWorker(None, PID)
+    conn = worker._open_hash_cache()
+    with conn:
+        conn.executemany(
+            "INSERT INTO h VALUES (?, ?, ?, ?)",
+            [(PID, "x", "t1", b"k1"), ("otro", "x", "t1", b"k2")],
+        )
+    conn.close()
+
+    worker._prune_hash_cache(PID, ["x"])
+
+    conn = sqlite3.connect(str(cache_path))
+    try:
+        assert conn.execute("SELECT pid FROM h").fetchall() == [("otro",)]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the duplicate keys used by progain4/del_duplicate.py.
+
+Checks that the amount is compared in integer cents, no matter how it was stored.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# del_duplicate imports PyQt6 and firebase_admin at module level
+pytest.importorskip("PyQt6.QtWidgets")
+pytest.importorskip("firebase_admin")
+
+from progain4.del_duplicate import _compute_keys, _dedup_key
+
+
+def test_equal_amounts_share_key():
+    """100, 100.0 and "100.00" are the same amount."""
+    keys = {
+        _dedup_key("a", "2024-01-05", "Cemento", 100),
+        _dedup_key("b", "2024-01-05", "Cemento", 100.0),
+        _dedup_key("c", "2024-01-05", "Cemento", "100.00"),
+    }
+    assert len(keys) == 1
+
+
+def test_cents_difference_changes_key():
+    """Records that differ only in cents are not duplicates."""
+    k1 = _dedup_key("a", "2024-01-05", "Cemento", 100.01)
+    k2 = _dedup_key("b", "2024-01-05", "Cemento", 100.02)
+    k3 = _dedup_key("c", "2024-01-05", "Cemento", 100)
+    assert len({k1, k2, k3}) == 3
+
+
+def test_description_normalized():
+    """Surrounding whitespace and case in the description do not matter."""
+    k1 = _dedup_key("a", "2024-01-05", "  Cemento ", 50)
+    k2 = _dedup_key("b", "2024-01-05", "CEMENTO", 50)
+    assert k1 == k2
+
+
+def test_missing_amount_is_zero():
+    """None and 0 give the same key."""
+    assert _dedup_key("a", "2024-01-05", "X", None) == _dedup_key("b", "2024-01-05", "X", 0)
+
+
+def test_invalid_amount_gets_unique_key():
+    """An amount that cannot be parsed never matches another record."""
+    k1 = _dedup_key("a", "2024-01-05", "X", "n/a")
+    k2 = _dedup_key("b", "2024-01-05", "X", "n/a")
+    assert k1 == b"error_a"
+    assert k1 != k2
+
+
+def test_compute_keys_matches_dedup_key():
+    """_compute_keys takes rows of (doc_id, (fecha, monto, descripcion))."""
+    rows = [
+        ("a", ("2024-01-05", 100, "Cemento")),
+        ("b", ("2024-01-05", "100.00", "cemento")),
+        ("c", ("2024-01-05", 100.5, "Cemento")),
+    ]
+    keys = _compute_keys(rows)
+    assert keys == [
+        _dedup_key(did, fecha, desc, monto)
+        for did, (fecha, monto, desc) in rows
+    ]
+    assert keys[0] == keys[1]
+    assert keys[0] != keys[2]
+    assert all(len(k) == 8 for k in keys)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))